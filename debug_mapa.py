@@ -4,74 +4,104 @@ Script para depurar el problema de visualización del mapa
 Analizará el HTML generado y verificará que todos los marcadores estén presentes
 """
 
+import mmap
 import os
-import sys
-import pandas as pd
+import numpy as np
 from pathlib import Path
 import re
 
-# Agregar el directorio src al path
-current_dir = Path(__file__).parent
-src_dir = current_dir / "src"
-sys.path.append(str(src_dir))
+# Los módulos de src/ se instalan con `pip install -e .` (ver pyproject.toml).
+# Solo se importa aquí lo que necesita analizar_html_mapa; los módulos
+# pesados (OR-Tools, Folium) se importan dentro de las funciones que los
+# usan para que un análisis de HTML arranque rápido
+from optimizador_rutas_smp.data_loader import cargar_direcciones
 
-from data_generator import DataGenerator
-from route_optimizer import RouteOptimizer
-from map_visualizer import MapVisualizer
+# Patrones de marcadores en el HTML, compilados una sola vez al importar
+# el módulo y combinados en una alternación para contarlos todos en una
+# única pasada sobre el archivo
+_PATRONES_MARCADOR = [
+    r'L\.marker\(',  # Marcadores de Folium
+    r'L\.divIcon\(',  # Marcadores de números
+    r'color.*?red',   # Marcadores rojos (almacén)
+    r'color.*?blue',  # Marcadores azules (entregas)
+    r'Orden en ruta',  # Popups con orden
+]
+_PATRON_COMBINADO = re.compile(
+    b'|'.join(f'({p})'.encode() for p in _PATRONES_MARCADOR),
+    re.IGNORECASE
+)
 
-def analizar_html_mapa(archivo_html):
+def analizar_html_mapa(archivo_html, df=None):
     """Analiza el contenido HTML del mapa para verificar marcadores"""
     if not os.path.exists(archivo_html):
         print(f"❌ Archivo no existe: {archivo_html}")
         return
-    
-    with open(archivo_html, 'r', encoding='utf-8') as f:
-        contenido = f.read()
-    
-    # Buscar marcadores en el HTML
-    patrones_marcador = [
-        r'L\.marker\(',  # Marcadores de Folium
-        r'L\.divIcon\(',  # Marcadores de números
-        r'color.*?red',   # Marcadores rojos (almacén)
-        r'color.*?blue',  # Marcadores azules (entregas)
-        r'Orden en ruta',  # Popups con orden
-    ]
-    
-    print(f"\n📄 ANÁLISIS DEL ARCHIVO HTML: {archivo_html}")
-    print(f"   Tamaño del archivo: {len(contenido):,} caracteres")
-    
-    for patron in patrones_marcador:
-        coincidencias = re.findall(patron, contenido, re.IGNORECASE)
-        print(f"   Patrón '{patron}': {len(coincidencias)} coincidencias")
-    
-    # Buscar coordenadas específicas en el HTML
-    print(f"\n📍 VERIFICANDO COORDENADAS EN EL HTML:")
-    df = pd.read_csv("data/direcciones_ejemplo.csv")
-    
-    for idx, row in df.iterrows():
-        lat_str = f"{row['latitud']:.4f}"
-        lon_str = f"{row['longitud']:.4f}"
-        
-        # Buscar si las coordenadas aparecen en el HTML
-        aparece_lat = lat_str in contenido
-        aparece_lon = lon_str in contenido
-        
-        estado = "✅" if (aparece_lat and aparece_lon) else "❌"
-        print(f"   {estado} Punto {idx:2d} ({row['tipo']:8s}): {lat_str}, {lon_str}")
-
-def generar_mapa_mejorado():
+
+    if df is None:
+        df = cargar_direcciones()
+
+    # mmap no acepta archivos de tamaño cero; un HTML vacío/truncado se
+    # reporta y listo, como hacía la lectura completa original
+    if os.path.getsize(archivo_html) == 0:
+        print(f"\n📄 ANÁLISIS DEL ARCHIVO HTML: {archivo_html}")
+        print("   ❌ Archivo vacío (0 bytes)")
+        return
+
+    # mmap evita copiar el archivo completo a memoria (el HTML de Folium
+    # puede llegar a varios MB)
+    with open(archivo_html, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as contenido:
+            print(f"\n📄 ANÁLISIS DEL ARCHIVO HTML: {archivo_html}")
+            print(f"   Tamaño del archivo: {len(contenido):,} bytes")
+
+            conteos = [0] * len(_PATRONES_MARCADOR)
+            for m in _PATRON_COMBINADO.finditer(contenido):
+                conteos[m.lastindex - 1] += 1
+
+            for patron, conteo in zip(_PATRONES_MARCADOR, conteos):
+                print(f"   Patrón '{patron}': {conteo} coincidencias")
+
+            # Buscar coordenadas específicas en el HTML: los 2N literales
+            # se combinan en una alternación y se buscan en UNA sola
+            # pasada, en vez de recorrer el archivo dos veces por punto
+            print(f"\n📍 VERIFICANDO COORDENADAS EN EL HTML:")
+
+            # Formateo vectorizado (en C) de los literales de coordenadas
+            lat_strs = np.char.mod('%.4f', df['latitud'].to_numpy())
+            lon_strs = np.char.mod('%.4f', df['longitud'].to_numpy())
+            tipos = df['tipo'].to_numpy()
+
+            patron_coords = re.compile(b'|'.join(
+                re.escape(literal.encode())
+                for literal in sorted(set(lat_strs) | set(lon_strs))
+            ))
+            encontrados = {m.group(0) for m in patron_coords.finditer(contenido)}
+
+            for idx, (lat_str, lon_str, tipo) in enumerate(
+                    zip(lat_strs, lon_strs, tipos)):
+                aparece_lat = lat_str.encode() in encontrados
+                aparece_lon = lon_str.encode() in encontrados
+
+                estado = "✅" if (aparece_lat and aparece_lon) else "❌"
+                print(f"   {estado} Punto {idx:2d} ({tipo:8s}): {lat_str}, {lon_str}")
+
+def generar_mapa_mejorado(df=None):
     """Genera un mapa mejorado con depuración extra"""
+    from optimizador_rutas_smp.cache import matriz_distancias_cacheada, resultado_optimizacion_cacheado
+    from optimizador_rutas_smp.data_generator import DataGenerator
+    from optimizador_rutas_smp.map_visualizer import MapVisualizer
+
     print("\n🛠️ GENERANDO MAPA MEJORADO CON DEPURACIÓN:")
-    
+
     # Cargar datos
-    df = pd.read_csv("data/direcciones_ejemplo.csv")
-    coordenadas = [(row['latitud'], row['longitud']) for _, row in df.iterrows()]
+    if df is None:
+        df = cargar_direcciones()
+    coordenadas = df[['latitud', 'longitud']].to_numpy(dtype=np.float64)
     
-    # Optimizar
+    # Optimizar (con cache en disco para no repetir el cálculo en cada corrida)
     generator = DataGenerator()
-    matriz_distancias = generator.calcular_matriz_distancias(coordenadas)
-    optimizer = RouteOptimizer(matriz_distancias, df)
-    resultado = optimizer.optimizar_ruta("ortools")
+    matriz_distancias = matriz_distancias_cacheada(generator, coordenadas)
+    resultado = resultado_optimizacion_cacheado(matriz_distancias, df, "ortools")
     
     # Crear visualizador
     ruta = resultado['mejor_ruta']
@@ -91,8 +121,8 @@ def generar_mapa_mejorado():
     
     print(f"   ✅ Mapa depurado guardado en: {archivo_mapa}")
     
-    # Analizar el nuevo archivo
-    analizar_html_mapa(str(archivo_mapa))
+    # Analizar el nuevo archivo (reutilizando el DataFrame ya cargado)
+    analizar_html_mapa(str(archivo_mapa), df)
     
     return str(archivo_mapa)
 
@@ -100,52 +130,78 @@ def main():
     print("🔍 DEPURANDO VISUALIZACIÓN DEL MAPA")
     print("=" * 60)
     
+    # Cargar los datos una sola vez para todo el proceso
+    df = cargar_direcciones()
+    
     # 1. Analizar mapa existente
     archivo_existente = "output/mapa_ruta_optimizada.html"
     if os.path.exists(archivo_existente):
-        analizar_html_mapa(archivo_existente)
+        analizar_html_mapa(archivo_existente, df)
     
     # 2. Generar nuevo mapa con debug
-    archivo_nuevo = generar_mapa_mejorado()
+    archivo_nuevo = generar_mapa_mejorado(df)
     
     # 3. Crear un mapa manual para verificar
     print(f"\n🎯 CREANDO MAPA DE VERIFICACIÓN MANUAL:")
-    crear_mapa_verificacion()
+    crear_mapa_verificacion(df)
 
-def crear_mapa_verificacion():
+def crear_mapa_verificacion(df=None, verbose=True):
     """Crea un mapa simple para verificar que todos los puntos aparezcan"""
     import folium
-    
+    from folium.plugins import FastMarkerCluster
+
     # Cargar datos
-    df = pd.read_csv("data/direcciones_ejemplo.csv")
-    
+    if df is None:
+        df = cargar_direcciones()
+
     # Crear mapa centrado en San Martín de Porres
     mapa = folium.Map(
         location=[-11.9775, -77.0904],
         zoom_start=13,
         tiles='OpenStreetMap'
     )
-    
-    # Agregar TODOS los puntos uno por uno con verificación
-    for idx, row in df.iterrows():
-        color = 'red' if row['tipo'] == 'almacen' else 'blue'
-        icon = 'home' if row['tipo'] == 'almacen' else 'shopping-cart'
-        
-        marcador = folium.Marker(
-            location=[row['latitud'], row['longitud']],
-            popup=f"<b>Punto {idx}</b><br>{row['tipo']}<br>{row['direccion']}",
-            tooltip=f"Punto {idx}: {row['tipo']}",
-            icon=folium.Icon(color=color, icon=icon, prefix='fa')
-        )
-        marcador.add_to(mapa)
-        
-        print(f"   ✅ Agregado marcador {idx:2d}: {row['tipo']:8s} en {row['latitud']:.4f}, {row['longitud']:.4f}")
-    
-    # Guardar
+
+    # Agregar TODOS los puntos en un solo lote: FastMarkerCluster envía
+    # un único blob JSON al navegador en vez de N objetos Folium
+    datos_marcadores = [
+        [lat, lon,
+         'red' if tipo == 'almacen' else 'blue',
+         'home' if tipo == 'almacen' else 'shopping-cart',
+         f"<b>Punto {idx}</b><br>{tipo}<br>{direccion}",
+         f"Punto {idx}: {tipo}"]
+        for idx, (lat, lon, tipo, direccion) in enumerate(
+            df[['latitud', 'longitud', 'tipo', 'direccion']].itertuples(index=False, name=None))
+    ]
+
+    callback = """
+    function (row) {
+        var marker = L.marker(new L.LatLng(row[0], row[1]), {
+            icon: L.AwesomeMarkers.icon({
+                icon: row[3], markerColor: row[2], prefix: 'fa'
+            })
+        });
+        marker.bindPopup(row[4]);
+        marker.bindTooltip(row[5]);
+        return marker;
+    }
+    """
+
+    FastMarkerCluster(datos_marcadores, callback=callback).add_to(mapa)
+
+    # __debug__ permite que `python -O` elimine la rama por completo
+    if __debug__ and verbose:
+        import sys
+        sys.stdout.write('\n'.join(
+            f"   ✅ Agregado marcador {tooltip} en {lat:.4f}, {lon:.4f}"
+            for lat, lon, _, _, _, tooltip in datos_marcadores
+        ) + '\n')
+
+    # Guardar: render único + escritura binaria bufferizada
     archivo_verificacion = "output/mapa_verificacion_todos_puntos.html"
-    mapa.save(archivo_verificacion)
+    with open(archivo_verificacion, 'wb', buffering=1 << 20) as f:
+        f.write(mapa.get_root().render().encode('utf-8'))
     print(f"   ✅ Mapa de verificación guardado en: {archivo_verificacion}")
-    
+
     return archivo_verificacion
 
 if __name__ == "__main__":
@@ -6,23 +6,23 @@ Script de depuración para identificar el problema con las rutas faltantes
 import os
 import sys
 import pandas as pd
+import numpy as np
 from pathlib import Path
 
-# Agregar el directorio src al path
-current_dir = Path(__file__).parent
-src_dir = current_dir / "src"
-sys.path.append(str(src_dir))
-
-from data_generator import DataGenerator
-from route_optimizer import RouteOptimizer
+# Los módulos de src/ se instalan con `pip install -e .` (ver pyproject.toml)
+from optimizador_rutas_smp.data_loader import cargar_direcciones
 
 def main():
+    # OR-Tools tarda cientos de ms en importar; se difiere hasta usarlo
+    from optimizador_rutas_smp.data_generator import DataGenerator
+    from optimizador_rutas_smp.route_optimizer import RouteOptimizer
+
     print("🔍 DEPURANDO PROBLEMA DE RUTAS FALTANTES")
     print("=" * 60)
     
     # 1. Cargar datos
     print("\n1. VERIFICANDO DATOS DE ENTRADA:")
-    df = pd.read_csv("data/direcciones_ejemplo.csv")
+    df = cargar_direcciones()
     print(f"   ✅ Total de filas en CSV: {len(df)}")
     print(f"   ✅ Índices: {df.index.tolist()}")
     print(f"   ✅ Tipos únicos: {df['tipo'].unique()}")
@@ -31,10 +31,10 @@ def main():
     
     # 2. Verificar coordenadas
     print("\n2. VERIFICANDO COORDENADAS:")
-    coordenadas = [(row['latitud'], row['longitud']) for _, row in df.iterrows()]
+    coordenadas = df[['latitud', 'longitud']].to_numpy(dtype=np.float64)
     print(f"   ✅ Coordenadas extraídas: {len(coordenadas)}")
-    for i, coord in enumerate(coordenadas):
-        print(f"   Punto {i}: {coord}")
+    for i, (lat, lon) in enumerate(coordenadas):
+        print(f"   Punto {i}: ({lat}, {lon})")
     
     # 3. Verificar matriz de distancias
     print("\n3. VERIFICANDO MATRIZ DE DISTANCIAS:")
@@ -79,12 +79,19 @@ def main():
         if extras:
             print(f"   ⚠️ PUNTOS EXTRA: {sorted(extras)}")
         
-        # Verificar secuencia
-        print(f"\n   🔄 SECUENCIA DE RUTA:")
-        for i, punto in enumerate(ruta):
-            tipo = df.iloc[punto]['tipo'] if punto < len(df) else 'DESCONOCIDO'
-            direccion = df.iloc[punto]['direccion'][:50] if punto < len(df) else 'DESCONOCIDO'
-            print(f"      {i+1:2d}. Punto {punto:2d} ({tipo:8s}): {direccion}...")
+        # Verificar secuencia: extraer las columnas a arrays una sola vez
+        # en vez de pagar el indexado de pandas (.iloc) en cada punto
+        tipos = df['tipo'].to_numpy()
+        direcciones_arr = df['direccion'].to_numpy()
+
+        # Una sola escritura a stdout en vez de un print por punto
+        lineas = [
+            f"      {i+1:2d}. Punto {punto:2d} "
+            f"({tipos[punto] if punto < len(df) else 'DESCONOCIDO':8s}): "
+            f"{direcciones_arr[punto][:50] if punto < len(df) else 'DESCONOCIDO'}..."
+            for i, punto in enumerate(ruta)
+        ]
+        sys.stdout.write("\n   🔄 SECUENCIA DE RUTA:\n" + '\n'.join(lineas) + '\n')
 
 if __name__ == "__main__":
     main()
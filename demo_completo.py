@@ -13,22 +13,23 @@ Autor: GitHub Copilot
 Fecha: 2024
 """
 
+import argparse
+import operator
 import os
 import sys
 import time
 import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
-# Agregar el directorio src al path para importar módulos
-current_dir = Path(__file__).parent
-src_dir = current_dir / "src"
-sys.path.append(str(src_dir))
-
-from data_generator import DataGenerator
-from route_optimizer import RouteOptimizer
-from map_visualizer import MapVisualizer
-from google_maps_visualizer import GoogleMapsVisualizer
+# Los módulos de src/ se instalan con `pip install -e .` (ver pyproject.toml)
+from optimizador_rutas_smp.cache import matriz_distancias_cacheada
+from optimizador_rutas_smp.data_generator import DataGenerator
+from optimizador_rutas_smp.route_optimizer import RouteOptimizer, FUERZA_BRUTA_MAX_PUNTOS
+from optimizador_rutas_smp.map_visualizer import MapVisualizer
+from optimizador_rutas_smp.google_maps_visualizer import GoogleMapsVisualizer
 
 def print_header(title):
     """Imprime un encabezado estilizado"""
@@ -43,20 +44,32 @@ def print_step(step, description):
 
 def print_results(distances, routes, nombres_lugares):
     """Imprime los resultados de optimización de forma organizada"""
-    print("\n📊 RESULTADOS DE OPTIMIZACIÓN:")
-    print("-" * 50)
-    
+    # Tupla inmutable: indexado más rápido y compatible con itemgetter
+    nombres_lugares = tuple(nombres_lugares)
+
+    lineas = ["\n📊 RESULTADOS DE OPTIMIZACIÓN:", "-" * 50]
+
     for i, (algoritmo, distancia, ruta) in enumerate(zip(
-        ["OR-Tools (Google)", "Vecino Más Cercano", "Fuerza Bruta"], 
+        ["OR-Tools (Google)", "Vecino Más Cercano", "Fuerza Bruta"],
         distances, routes), 1):
-        
-        print(f"\n{i}. {algoritmo}:")
-        print(f"   Distancia total: {distancia:.2f} km")
-        print(f"   Ruta: {' → '.join([nombres_lugares[i] for i in ruta])}")
 
-def ejecutar_demo_completo():
+        # itemgetter hace el gather de nombres en una sola llamada C
+        recorrido = ' → '.join(operator.itemgetter(*ruta)(nombres_lugares))
+        lineas.append(f"\n{i}. {algoritmo}:")
+        lineas.append(f"   Distancia total: {distancia:.2f} km")
+        lineas.append(f"   Ruta: {recorrido}")
+
+    # Una sola escritura a stdout en vez de un print por línea
+    sys.stdout.write('\n'.join(lineas) + '\n')
+
+def _ejecutar_metodo(matriz_distancias, direcciones, metodo):
+    """Resuelve un método de optimización (ejecutable en un proceso aparte)"""
+    optimizer = RouteOptimizer(matriz_distancias, direcciones)
+    return optimizer.optimizar_ruta(metodo)
+
+def ejecutar_demo_completo(google_api_key=None, no_interactivo=False):
     """Ejecuta una demostración completa del sistema"""
-    
+
     print_header("SISTEMA DE OPTIMIZACIÓN DE RUTAS LOGÍSTICAS")
     print("🏢 Empresa: Entregas San Martín de Porres")
     print("📅 Fecha:", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
@@ -70,8 +83,10 @@ def ejecutar_demo_completo():
     output_dir.mkdir(exist_ok=True)
     print(f"✅ Directorio de salida: {output_dir.absolute()}")
     
-    # Configurar Google Maps (opcional)
-    google_api_key = input("\n🗝️  Ingresa tu Google Maps API Key (Enter para omitir): ").strip()
+    # Configurar Google Maps (opcional). Solo preguntar por consola si hay
+    # una terminal interactiva; en CI / batch se usa el argumento o env var
+    if google_api_key is None and not no_interactivo and sys.stdin.isatty():
+        google_api_key = input("\n🗝️  Ingresa tu Google Maps API Key (Enter para omitir): ").strip()
     if not google_api_key:
         print("⚠️  Usando OpenStreetMap como alternativa")
         google_api_key = None
@@ -91,7 +106,7 @@ def ejecutar_demo_completo():
         df_subset = df.head(15)
         
         direcciones = df_subset['direccion'].tolist()
-        coordenadas = [(row['latitud'], row['longitud']) for _, row in df_subset.iterrows()]
+        coordenadas = df_subset[['latitud', 'longitud']].to_numpy(dtype=np.float64)
         
         print(f"✅ {len(direcciones)} direcciones generadas")
         print(f"✅ {len(coordenadas)} coordenadas obtenidas")
@@ -112,41 +127,52 @@ def ejecutar_demo_completo():
     print_step(3, "Optimizando rutas")
     
     try:
-        # Calcular matriz de distancias
-        matriz_distancias = generator.calcular_matriz_distancias(coordenadas)
+        # Calcular matriz de distancias (cacheada en disco por coordenadas)
+        matriz_distancias = matriz_distancias_cacheada(generator, coordenadas)
         
         # Crear DataFrame con direcciones
         df_optimizer = pd.DataFrame({
             'direccion': direcciones,
-            'latitud': [coord[0] for coord in coordenadas],
-            'longitud': [coord[1] for coord in coordenadas],
+            'latitud': coordenadas[:, 0],
+            'longitud': coordenadas[:, 1],
             'tipo': ['entrega'] * len(direcciones)  # Agregar columna tipo
         })
         
-        optimizer = RouteOptimizer(matriz_distancias, df_optimizer)
-        
         print("🔄 Calculando matriz de distancias...")
         start_time = time.time()
-        
-        # Optimización con OR-Tools
-        resultado_ortools = optimizer.optimizar_ruta("ortools")
+
+        # Métodos a comparar (fuerza bruta solo si hay pocos puntos)
+        metodos = ["ortools", "vecino_cercano"]
+        if len(coordenadas) <= FUERZA_BRUTA_MAX_PUNTOS:
+            metodos.append("fuerza_bruta")
+        else:
+            print("⚠️  Fuerza bruta omitida (demasiados puntos)")
+
+        # Los algoritmos son lecturas independientes de la misma matriz:
+        # ejecutarlos en procesos paralelos en vez de secuencialmente
+        with ProcessPoolExecutor(max_workers=len(metodos)) as executor:
+            futuros = {
+                metodo: executor.submit(_ejecutar_metodo, matriz_distancias,
+                                        df_optimizer, metodo)
+                for metodo in metodos
+            }
+            resultados_metodos = {m: f.result() for m, f in futuros.items()}
+
+        resultado_ortools = resultados_metodos["ortools"]
         distancia_ortools = resultado_ortools['mejor_distancia_km']
         ruta_ortools = resultado_ortools['mejor_ruta']
-        
-        # Optimización con vecino más cercano
-        resultado_vecino = optimizer.optimizar_ruta("vecino_cercano")
+
+        resultado_vecino = resultados_metodos["vecino_cercano"]
         distancia_vecino = resultado_vecino['mejor_distancia_km']
         ruta_vecino = resultado_vecino['mejor_ruta']
-        
-        # Optimización con fuerza bruta (solo si hay pocos puntos)
-        if len(coordenadas) <= 10:
-            resultado_bruta = optimizer.optimizar_ruta("fuerza_bruta")
+
+        if "fuerza_bruta" in resultados_metodos:
+            resultado_bruta = resultados_metodos["fuerza_bruta"]
             distancia_bruta = resultado_bruta['mejor_distancia_km']
             ruta_bruta = resultado_bruta['mejor_ruta']
         else:
             distancia_bruta, ruta_bruta = None, None
-            print("⚠️  Fuerza bruta omitida (demasiados puntos)")
-        
+
         optimization_time = time.time() - start_time
         print(f"✅ Optimización completada en {optimization_time:.2f} segundos")
         
@@ -190,8 +216,8 @@ def ejecutar_demo_completo():
             )
             
             archivo_google = output_dir / "mapa_google_demo.html"
-            with open(archivo_google, 'w', encoding='utf-8') as f:
-                f.write(mapa_google)
+            with open(archivo_google, 'wb', buffering=1 << 20) as f:
+                f.write(mapa_google.encode('utf-8'))
             print(f"✅ Mapa Google guardado: {archivo_google}")
         else:
             print("⚠️  Mapa Google omitido (sin API key)")
@@ -223,8 +249,23 @@ def ejecutar_demo_completo():
 
 def main():
     """Función principal"""
+    parser = argparse.ArgumentParser(
+        description="Demo completo del Sistema de Optimización de Rutas"
+    )
+    parser.add_argument(
+        '--google-api-key',
+        default=os.environ.get('GOOGLE_MAPS_API_KEY'),
+        help='Google Maps API Key (por defecto se toma de GOOGLE_MAPS_API_KEY)'
+    )
+    parser.add_argument(
+        '--no-interactivo',
+        action='store_true',
+        help='No solicitar datos por consola (para CI o ejecución batch)'
+    )
+    args = parser.parse_args()
+
     try:
-        exito = ejecutar_demo_completo()
+        exito = ejecutar_demo_completo(args.google_api_key, args.no_interactivo)
         
         if exito:
             print("\n" + "="*60)
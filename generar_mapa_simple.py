@@ -5,18 +5,16 @@ Versión sin errores para demostrar funcionalidad
 """
 
 import os
-import sys
 import pandas as pd
+import numpy as np
 from pathlib import Path
 
-# Agregar el directorio src al path
-current_dir = Path(__file__).parent
-src_dir = current_dir / "src"
-sys.path.append(str(src_dir))
-
-from data_generator import DataGenerator
-from route_optimizer import RouteOptimizer
-from map_visualizer import MapVisualizer
+# Los módulos de src/ se instalan con `pip install -e .` (ver pyproject.toml)
+from optimizador_rutas_smp.cache import matriz_distancias_cacheada, resultado_optimizacion_cacheado
+from optimizador_rutas_smp.data_generator import DataGenerator
+from optimizador_rutas_smp.data_loader import cargar_direcciones
+from optimizador_rutas_smp.route_optimizer import RouteOptimizer
+from optimizador_rutas_smp.map_visualizer import MapVisualizer
 
 def main():
     print("🚀 Generando sistema de optimización simplificado...")
@@ -28,22 +26,21 @@ def main():
     try:
         # 1. Usar los datos existentes
         print("📊 Cargando datos de ejemplo...")
-        df = pd.read_csv("data/direcciones_ejemplo.csv")
+        df = cargar_direcciones()
         print(f"✅ {len(df)} direcciones cargadas")
         
         # 2. Extraer coordenadas
-        coordenadas = [(row['latitud'], row['longitud']) for _, row in df.iterrows()]
+        coordenadas = df[['latitud', 'longitud']].to_numpy(dtype=np.float64)
         
-        # 3. Generar matriz de distancias
+        # 3. Generar matriz de distancias (cacheada en disco)
         print("🔄 Calculando matriz de distancias...")
         generator = DataGenerator()
-        matriz_distancias = generator.calcular_matriz_distancias(coordenadas)
+        matriz_distancias = matriz_distancias_cacheada(generator, coordenadas)
         print("✅ Matriz calculada")
-        
-        # 4. Optimizar rutas
+
+        # 4. Optimizar rutas (resultado cacheado por matriz y método)
         print("🚀 Optimizando rutas...")
-        optimizer = RouteOptimizer(matriz_distancias, df)
-        resultado = optimizer.optimizar_ruta("ortools")
+        resultado = resultado_optimizacion_cacheado(matriz_distancias, df, "ortools")
         
         distancia = resultado['mejor_distancia_km']
         ruta = resultado['mejor_ruta']
@@ -3,26 +3,62 @@
 Script para ejecutar todas las pruebas del proyecto.
 """
 
+import hashlib
+import json
 import unittest
 import sys
 import os
 from pathlib import Path
 
-# Agregar directorios al path
+# Los módulos de src/ se instalan con `pip install -e .` (ver pyproject.toml);
+# tests/ se agrega al path solo para poder importar tests por nombre
 project_root = Path(__file__).parent
-sys.path.insert(0, str(project_root / "src"))
 sys.path.insert(0, str(project_root / "tests"))
 
+def _cargar_suite(test_dir, test_loader):
+    """Carga la suite de pruebas usando un manifiesto cacheado por mtime.
+
+    discover() recorre el filesystem e importa cada módulo de test en
+    cada corrida; si los archivos no cambiaron, se reutiliza la lista de
+    módulos descubiertos la vez anterior.
+    """
+    archivos = sorted(test_dir.rglob('test_*.py'))
+    clave = hashlib.blake2b(
+        b''.join(f"{p}:{p.stat().st_mtime_ns}".encode() for p in archivos),
+        digest_size=16
+    ).hexdigest()
+
+    cache_file = project_root / ".pytest_cache" / "discover.json"
+    try:
+        cache = json.loads(cache_file.read_text())
+    except (OSError, json.JSONDecodeError):
+        cache = {}
+
+    if cache.get('clave') == clave:
+        return unittest.TestSuite(
+            test_loader.loadTestsFromName(nombre) for nombre in cache['modulos']
+        )
+
+    suite = test_loader.discover(str(test_dir), pattern='test_*.py')
+
+    cache_file.parent.mkdir(exist_ok=True)
+    cache_file.write_text(json.dumps({
+        'clave': clave,
+        'modulos': [p.stem for p in archivos],
+    }))
+
+    return suite
+
 def run_all_tests():
     """Ejecuta todas las pruebas del proyecto"""
     print("=" * 60)
     print("EJECUTANDO SUITE COMPLETA DE PRUEBAS")
     print("=" * 60)
     
-    # Buscar todos los archivos de test
+    # Buscar todos los archivos de test (con cache de descubrimiento)
     test_dir = project_root / "tests"
     test_loader = unittest.TestLoader()
-    test_suite = test_loader.discover(str(test_dir), pattern='test_*.py')
+    test_suite = _cargar_suite(test_dir, test_loader)
     
     # Ejecutar pruebas con verbose output
     runner = unittest.TextTestRunner(verbosity=2)
@@ -4,12 +4,16 @@ Versión sin dependencias complejas que garantiza la visualización correcta.
 """
 
 import streamlit as st
-import pandas as pd
-import numpy as np
 import os
+import shutil
 import sys
 from pathlib import Path
 
+# pandas (vía data_loader) se importa dentro del loader cacheado: el
+# arranque en frío de la app no paga los ~200 ms de cargar la extensión
+# C si el usuario no abre la pestaña de datos
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
 # Configuración
 st.set_page_config(
     page_title="🚚 Optimizador de Rutas - Versión Simplificada",
@@ -17,9 +21,10 @@ st.set_page_config(
     layout="wide"
 )
 
-# CSS mejorado
-st.markdown("""
-<style>
+# CSS de la app: se escribe una vez a static/app.css y se referencia con
+# un <link>, así cada rerun transporta ~60 bytes en vez de re-serializar
+# el bloque completo y el navegador lo cachea con HTTP normal
+_APP_CSS = """
     .header-container {
         background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
         padding: 2rem;
@@ -83,70 +88,232 @@ st.markdown("""
         overflow: hidden;
         box-shadow: 0 4px 15px rgba(0,0,0,0.1);
     }
-</style>
-""", unsafe_allow_html=True)
+"""
 
-# Header principal
-st.markdown("""
+# Header estático; se emite junto con el <link> del CSS en una sola llamada
+_HEADER_HTML = """
 <div class="header-container">
     <h1>🚚 Optimizador de Rutas de Última Milla</h1>
     <h2>📍 San Martín de Porres, Lima, Perú</h2>
     <p style="font-size: 18px; margin-top: 1rem;">Versión Simplificada y Robusta</p>
 </div>
-""", unsafe_allow_html=True)
+"""
 
 # This is a Streamlit application, so there is no main function.
 # The code below is executed from top to bottom when the app is run.
 
-# Agregar path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-
 # Verificar archivos
-data_dir = "../data"
-output_dir = "../output"
+# Directorios como Path construidos una sola vez
+data_dir = Path("../data")
+output_dir = Path("../output")
 
-# Estados de archivos
-direcciones_existe = os.path.exists(os.path.join(data_dir, "direcciones_ejemplo.csv"))
-mapa_directo_existe = os.path.exists(os.path.join(output_dir, "mapa_DIRECTO_todas_entregas.html"))
-verificacion_existe = os.path.exists(os.path.join(output_dir, "VERIFICACION_COMPLETA.html"))
 
-# Panel de estado
-col1, col2, col3 = st.columns(3)
+# Carga y análisis cacheados: Streamlit re-ejecuta todo el script en cada
+# interacción; con st.cache_data el CSV solo se vuelve a parsear si cambia
+# su mtime (los reruns pagan únicamente un stat del archivo)
+@st.cache_resource(ttl=5, show_spinner=False)
+def escanear_directorio(directorio):
+    """Nombres presentes en un directorio (un solo scandir, TTL de 5 s).
+
+    Cada rerun hacía hasta siete os.path.exists (siete stats); un único
+    scandir lee el directorio de una vez y los chequeos pasan a ser
+    pertenencia en set.
+    """
+    try:
+        with os.scandir(directorio) as it:
+            return {entrada.name for entrada in it}
+    except FileNotFoundError:
+        return set()
+
+
+@st.cache_data(show_spinner=False)
+def cargar_entregas(ruta_csv, mtime):
+    """Carga el dataset de entregas (cacheado por ruta + mtime).
+
+    Delega en data_loader.cargar_direcciones, que mantiene un sidecar
+    Parquet junto al CSV: la primera carga parsea el texto (con dtypes
+    explícitos) y lo escribe en columnar; las siguientes leen el Parquet
+    sin tokenización por fila.
+    """
+    from optimizador_rutas_smp.data_loader import cargar_direcciones
+    return cargar_direcciones(ruta_csv)
+
+
+# Raíz del proyecto: los generadores (solucion_definitiva,
+# verificacion_extrema) viven ahí y usan rutas relativas data/ y output/
+_RAIZ_PROYECTO = Path(__file__).resolve().parents[1]
+sys.path.append(str(_RAIZ_PROYECTO))
+
+
+def ejecutar_en_raiz(funcion):
+    """Ejecuta un generador en proceso con cwd en la raíz del proyecto.
+
+    Llamarlo directamente evita un arranque completo del intérprete y la
+    re-importación de pandas/numpy/folium que pagaba cada subprocess.
+    """
+    previo = os.getcwd()
+    os.chdir(_RAIZ_PROYECTO)
+    try:
+        return funcion()
+    finally:
+        os.chdir(previo)
 
-with col1:
-    st.markdown(f"""
+
+# Los HTML generados se sirven por la ruta estática de Streamlit
+# (server.enableStaticServing, ver .streamlit/config.toml): el iframe
+# solo transporta la URL (~200 bytes) y el navegador cachea el blob con
+# HTTP normal, en vez de reenviar cientos de KB por protobuf en cada rerun
+_STATIC_DIR = Path(__file__).resolve().parent / "static"
+
+
+def publicar_html(nombre):
+    """Copia un HTML de output/ a static/ (solo si cambió) y da su URL.
+
+    El ?v=mtime invalida el cache del navegador cuando el mapa se
+    regenera; sin él, el iframe seguiría mostrando el HTML anterior.
+    """
+    origen = output_dir / nombre
+    destino = _STATIC_DIR / nombre
+    mtime = origen.stat().st_mtime
+    if not destino.exists() or destino.stat().st_mtime < mtime:
+        _STATIC_DIR.mkdir(exist_ok=True)
+        shutil.copy2(origen, destino)
+    return f"app/static/{nombre}?v={int(mtime)}"
+
+
+# Generadores cacheados por mtime del CSV: si los datos no cambiaron,
+# un segundo clic del botón devuelve el estado cacheado al instante en
+# vez de volver a correr el solver y reescribir el HTML
+@st.cache_data(show_spinner=False)
+def generar_mapa_directo(csv_mtime):
+    """Genera el mapa separado (una vez por versión del CSV)."""
+    from solucion_definitiva import crear_mapa_super_separado
+    return ejecutar_en_raiz(crear_mapa_super_separado)
+
+
+@st.cache_data(show_spinner=False)
+def generar_verificacion(csv_mtime):
+    """Genera el mapa de verificación (una vez por versión del CSV)."""
+    from verificacion_extrema import crear_mapa_verificacion_completa
+    return ejecutar_en_raiz(crear_mapa_verificacion_completa)
+
+
+@st.cache_resource(show_spinner=False)
+def publicar_css():
+    """Escribe el CSS a static/app.css (una vez por proceso) y da su URL."""
+    _STATIC_DIR.mkdir(exist_ok=True)
+    (_STATIC_DIR / "app.css").write_text(_APP_CSS, encoding='utf-8')
+    return "app/static/app.css"
+
+
+@st.cache_data(show_spinner=False)
+def detectar_superpuestos(df):
+    """Devuelve las filas con coordenadas repetidas, ya agrupadas.
+
+    Un lexsort + comparación con el vecino sobre los arrays float32 de
+    coordenadas: bucles C contiguos sin buckets hash ni objetos Python
+    por fila. Una fila es duplicada si coincide con su vecina anterior o
+    siguiente en el orden (lat, lon).
+    """
+    import numpy as np
+
+    lat = df['latitud'].to_numpy()
+    lon = df['longitud'].to_numpy()
+    orden = np.lexsort((lon, lat))
+    lat_ord = lat[orden]
+    lon_ord = lon[orden]
+
+    igual_previo = (lat_ord[1:] == lat_ord[:-1]) & (lon_ord[1:] == lon_ord[:-1])
+    duplicada = np.zeros(len(df), dtype=bool)
+    duplicada[1:] |= igual_previo
+    duplicada[:-1] |= igual_previo
+
+    return df.iloc[orden[duplicada]]
+
+# Tarjetas de puntos críticos: HTML totalmente estático, construido una
+# sola vez en el import en lugar de re-armarse en cada rerun
+_PUNTOS_CRITICOS_HTML = """
+<div class="status-warning">
+    <h4>⚠️ Puntos Críticos Identificados:</h4>
+    <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 1rem; margin-top: 1rem;">
+        <div style="background: white; padding: 1rem; border-radius: 8px; border-left: 4px solid #1A237E;">
+            <strong>🔵 Entrega 8</strong><br>
+            Orden: 14<br>
+            Jr. Santa Rosa 106
+        </div>
+        <div style="background: white; padding: 1rem; border-radius: 8px; border-left: 4px solid #E91E63;">
+            <strong>🩷 Entrega 13</strong><br>
+            Orden: 13<br>
+            Jr. San Martín 110
+        </div>
+        <div style="background: white; padding: 1rem; border-radius: 8px; border-left: 4px solid #424242;">
+            <strong>⚫ Entrega 14</strong><br>
+            Orden: 15<br>
+            Av. Universitaria 474
+        </div>
+        <div style="background: white; padding: 1rem; border-radius: 8px; border-left: 4px solid #03A9F4;">
+            <strong>🔵 Entrega 15</strong><br>
+            Orden: 12<br>
+            Jr. Los Olivos 476
+        </div>
+    </div>
+</div>
+"""
+
+# Hoja de estilos por <link> + header, en una sola llamada
+st.markdown(
+    f'<link rel="stylesheet" href="{publicar_css()}">' + _HEADER_HTML,
+    unsafe_allow_html=True)
+
+# Estados de archivos
+archivos_salida = escanear_directorio(output_dir)
+direcciones_existe = "direcciones_ejemplo.csv" in escanear_directorio(data_dir)
+mapa_directo_existe = "mapa_DIRECTO_todas_entregas.html" in archivos_salida
+verificacion_existe = "VERIFICACION_COMPLETA.html" in archivos_salida
+
+# Panel de estado: un solo st.markdown con CSS grid, y el HTML memoizado
+# por la tupla de banderas. st.cache_data sobrevive a los reruns (un
+# lru_cache definido en el cuerpo del script se recrearía en cada
+# re-ejecución); solo hay 8 salidas posibles
+@st.cache_data(show_spinner=False)
+def _panel_estado_html(datos, mapa, verificacion):
+    return f"""
+<div style="display: grid; grid-template-columns: repeat(3, 1fr); gap: 1rem;">
     <div class="metric-container">
         <h3>📊 Datos</h3>
-        <p>{'✅ Disponibles' if direcciones_existe else '❌ No encontrados'}</p>
+        <p>{'✅ Disponibles' if datos else '❌ No encontrados'}</p>
         <small>16 puntos (1 almacén + 15 entregas)</small>
     </div>
-    """, unsafe_allow_html=True)
-
-with col2:
-    st.markdown(f"""
     <div class="metric-container">
         <h3>🗺️ Mapa Directo</h3>
-        <p>{'✅ Generado' if mapa_directo_existe else '❌ No disponible'}</p>
+        <p>{'✅ Generado' if mapa else '❌ No disponible'}</p>
         <small>Leaflet sin dependencias complejas</small>
     </div>
-    """, unsafe_allow_html=True)
-
-with col3:
-    st.markdown(f"""
     <div class="metric-container">
         <h3>🔍 Verificación</h3>
-        <p>{'✅ Completa' if verificacion_existe else '❌ Pendiente'}</p>
+        <p>{'✅ Completa' if verificacion else '❌ Pendiente'}</p>
         <small>Documentación del problema</small>
     </div>
-    """, unsafe_allow_html=True)
+</div>
+"""
+
+
+st.markdown(
+    _panel_estado_html(direcciones_existe, mapa_directo_existe, verificacion_existe),
+    unsafe_allow_html=True)
 
 # Sección principal
 st.markdown("---")
 
-# Tabs principales
-tab1, tab2, tab3 = st.tabs(["🗺️ Mapa Interactivo", "📊 Datos de Verificación", "🔧 Herramientas"])
+# Cada pestaña se renderiza dentro de un @st.fragment: los widgets de una
+# pestaña re-ejecutan solo su fragmento, no todo el script de arriba a
+# abajo (stats de archivos, CSV y HTMLs de las otras pestañas incluidos)
+
 
-with tab1:
+@st.fragment
+def render_tab_mapa():
+    mapa_directo_existe = (
+        "mapa_DIRECTO_todas_entregas.html" in escanear_directorio(output_dir))
     st.markdown("""
     <div class="status-success">
         <h3>🎯 Mapa con TODAS las Entregas Visibles</h3>
@@ -155,45 +322,16 @@ with tab1:
     """, unsafe_allow_html=True)
     
     if mapa_directo_existe:
-        archivo_mapa = os.path.join(output_dir, "mapa_DIRECTO_todas_entregas.html")
-        
-        # Leer y mostrar el mapa
+        # Mostrar el mapa por URL estática (el navegador lo cachea)
         try:
-            with open(archivo_mapa, 'r', encoding='utf-8') as f:
-                mapa_html = f.read()
-            
+            url_mapa = publicar_html("mapa_DIRECTO_todas_entregas.html")
+
             st.markdown('<div class="iframe-container">', unsafe_allow_html=True)
-            st.components.v1.html(mapa_html, height=600, scrolling=False)
+            st.components.v1.iframe(url_mapa, height=600, scrolling=False)
             st.markdown('</div>', unsafe_allow_html=True)
             
-            # Información de puntos críticos
-            st.markdown("""
-            <div class="status-warning">
-                <h4>⚠️ Puntos Críticos Identificados:</h4>
-                <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 1rem; margin-top: 1rem;">
-                    <div style="background: white; padding: 1rem; border-radius: 8px; border-left: 4px solid #1A237E;">
-                        <strong>🔵 Entrega 8</strong><br>
-                        Orden: 14<br>
-                        Jr. Santa Rosa 106
-                    </div>
-                    <div style="background: white; padding: 1rem; border-radius: 8px; border-left: 4px solid #E91E63;">
-                        <strong>🩷 Entrega 13</strong><br>
-                        Orden: 13<br>
-                        Jr. San Martín 110
-                    </div>
-                    <div style="background: white; padding: 1rem; border-radius: 8px; border-left: 4px solid #424242;">
-                        <strong>⚫ Entrega 14</strong><br>
-                        Orden: 15<br>
-                        Av. Universitaria 474
-                    </div>
-                    <div style="background: white; padding: 1rem; border-radius: 8px; border-left: 4px solid #03A9F4;">
-                        <strong>🔵 Entrega 15</strong><br>
-                        Orden: 12<br>
-                        Jr. Los Olivos 476
-                    </div>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+            # Información de puntos críticos (constante de módulo)
+            st.markdown(_PUNTOS_CRITICOS_HTML, unsafe_allow_html=True)
             
         except Exception as e:
             st.error(f"Error cargando mapa: {e}")
@@ -205,7 +343,13 @@ with tab1:
         </div>
         """, unsafe_allow_html=True)
 
-with tab2:
+@st.fragment
+def render_tab_datos():
+    verificacion_existe = (
+        "VERIFICACION_COMPLETA.html" in escanear_directorio(output_dir))
+    direcciones_existe = (
+        "direcciones_ejemplo.csv" in escanear_directorio(data_dir))
+
     st.markdown("""
     <div class="status-success">
         <h3>📋 Verificación Completa del Problema</h3>
@@ -214,14 +358,11 @@ with tab2:
     """, unsafe_allow_html=True)
     
     if verificacion_existe:
-        archivo_verificacion = os.path.join(output_dir, "VERIFICACION_COMPLETA.html")
-        
         try:
-            with open(archivo_verificacion, 'r', encoding='utf-8') as f:
-                verificacion_html = f.read()
-            
+            url_verificacion = publicar_html("VERIFICACION_COMPLETA.html")
+
             st.markdown('<div class="iframe-container">', unsafe_allow_html=True)
-            st.components.v1.html(verificacion_html, height=800, scrolling=True)
+            st.components.v1.iframe(url_verificacion, height=800, scrolling=True)
             st.markdown('</div>', unsafe_allow_html=True)
             
         except Exception as e:
@@ -232,38 +373,44 @@ with tab2:
     # Mostrar datos si están disponibles
     if direcciones_existe:
         st.subheader("📊 Datos de Entregas")
-        df = pd.read_csv(os.path.join(data_dir, "direcciones_ejemplo.csv"))
-        
-        # Identificar puntos problemáticos
-        coords_duplicadas = df.groupby(['latitud', 'longitud']).size()
-        puntos_superpuestos = coords_duplicadas[coords_duplicadas > 1]
+        ruta_csv = data_dir / "direcciones_ejemplo.csv"
+        df = cargar_entregas(str(ruta_csv), ruta_csv.stat().st_mtime)
+
+        # Identificar puntos problemáticos (análisis cacheado)
+        puntos_superpuestos = detectar_superpuestos(df)
         
         if not puntos_superpuestos.empty:
-            st.markdown("""
+            # Una tarjeta HTML por grupo, emitidas todas con un solo
+            # st.markdown en vez de un delta por coordenada y por punto
+            tarjetas = ["""
             <div class="status-warning">
                 <h4>⚠️ Coordenadas Duplicadas Encontradas:</h4>
             </div>
-            """, unsafe_allow_html=True)
-            
-            for (lat, lng), count in puntos_superpuestos.items():
-                puntos_en_coord = df[(df['latitud'] == lat) & (df['longitud'] == lng)]
-                
-                st.markdown(f"""
+            """]
+
+            grupos = puntos_superpuestos.groupby(
+                ['latitud', 'longitud'], sort=False)
+            for (lat, lng), grupo in grupos:
+                detalle = ''.join(
+                    f"<p>• <strong>Punto {punto.id}</strong>: {punto.direccion}</p>"
+                    for punto in grupo.itertuples()
+                )
+                tarjetas.append(f"""
                 <div class="entrega-card problema-entrega">
                     <h5>Coordenada: {lat:.6f}, {lng:.6f}</h5>
-                    <p><strong>{count} puntos superpuestos:</strong></p>
-                """, unsafe_allow_html=True)
-                
-                for _, punto in puntos_en_coord.iterrows():
-                    st.write(f"- **Punto {punto['id']}**: {punto['direccion']}")
-                
-                st.markdown("</div>", unsafe_allow_html=True)
+                    <p><strong>{len(grupo)} puntos superpuestos:</strong></p>
+                    {detalle}
+                </div>
+                """)
+
+            st.markdown('\n'.join(tarjetas), unsafe_allow_html=True)
         
         # Mostrar tabla completa
         st.subheader("📋 Lista Completa de Entregas")
         st.dataframe(df, use_container_width=True)
 
-with tab3:
+@st.fragment
+def render_tab_herramientas():
     st.markdown("""
     <div class="status-success">
         <h3>🔧 Herramientas de Generación</h3>
@@ -277,41 +424,28 @@ with tab3:
         if st.button("🗺️ Generar Mapa Directo", type="primary", use_container_width=True):
             with st.spinner("Generando mapa directo..."):
                 try:
-                    import subprocess
-                    result = subprocess.run(
-                        ["python", "solucion_definitiva.py"], 
-                        cwd="..", 
-                        capture_output=True, 
-                        text=True, 
-                        timeout=60
-                    )
-                    if result.returncode == 0:
-                        st.success("✅ Mapa directo generado exitosamente!")
-                        st.rerun()
-                    else:
-                        st.error(f"❌ Error: {result.stderr}")
+                    # Llamada directa en proceso (cacheada por mtime del
+                    # CSV) en vez de lanzar otro intérprete
+                    csv_mtime = (data_dir / "direcciones_ejemplo.csv").stat().st_mtime
+                    generar_mapa_directo(csv_mtime)
+                    # Invalidar el scan de archivos en vez de forzar un
+                    # rerun global: las otras pestañas verán el archivo
+                    # nuevo en su próximo render sin re-ejecutar todo
+                    escanear_directorio.clear()
+                    st.success("✅ Mapa directo generado exitosamente!")
                 except Exception as e:
-                    st.error(f"❌ Error ejecutando script: {e}")
+                    st.error(f"❌ Error ejecutando generador: {e}")
     
     with col_t2:
         if st.button("🔍 Generar Verificación", use_container_width=True):
             with st.spinner("Generando verificación..."):
                 try:
-                    import subprocess
-                    result = subprocess.run(
-                        ["python", "verificacion_extrema.py"], 
-                        cwd="..", 
-                        capture_output=True, 
-                        text=True, 
-                        timeout=60
-                    )
-                    if result.returncode == 0:
-                        st.success("✅ Verificación generada exitosamente!")
-                        st.rerun()
-                    else:
-                        st.error(f"❌ Error: {result.stderr}")
+                    csv_mtime = (data_dir / "direcciones_ejemplo.csv").stat().st_mtime
+                    generar_verificacion(csv_mtime)
+                    escanear_directorio.clear()
+                    st.success("✅ Verificación generada exitosamente!")
                 except Exception as e:
-                    st.error(f"❌ Error ejecutando script: {e}")
+                    st.error(f"❌ Error ejecutando generador: {e}")
     
     # Links directos a archivos
     st.subheader("📁 Archivos Disponibles")
@@ -323,13 +457,33 @@ with tab3:
         ("mapa_VERIFICACION_EXTREMA.html", "⚡ Mapa de Verificación Extrema")
     ]
     
+    # Toda la lista en un solo st.markdown (bloques de código cercados)
+    # en vez de hasta dos deltas por archivo
+    presentes = escanear_directorio(output_dir)
+    partes = []
     for archivo, descripcion in archivos_disponibles:
-        ruta_archivo = os.path.join(output_dir, archivo)
-        if os.path.exists(ruta_archivo):
-            st.markdown(f"✅ **{descripcion}**")
-            st.code(f"file:///{os.path.abspath(ruta_archivo)}", language="text")
+        if archivo in presentes:
+            partes.append(
+                f"✅ **{descripcion}**\n\n"
+                f"```text\nfile:///{(output_dir / archivo).resolve()}\n```\n")
         else:
-            st.markdown(f"❌ **{descripcion}** - No disponible")
+            partes.append(f"❌ **{descripcion}** - No disponible\n")
+    st.markdown('\n'.join(partes))
+
+
+# Pestañas vía st.radio: st.tabs construye las tres pestañas en cada
+# rerun (las inactivas solo se ocultan con CSS); con el radio únicamente
+# se ejecuta el cuerpo de la sección seleccionada
+_PESTANAS = ("🗺️ Mapa Interactivo", "📊 Datos de Verificación", "🔧 Herramientas")
+pestana_activa = st.radio(
+    "Sección", _PESTANAS, horizontal=True, label_visibility="collapsed")
+
+if pestana_activa == _PESTANAS[0]:
+    render_tab_mapa()
+elif pestana_activa == _PESTANAS[1]:
+    render_tab_datos()
+else:
+    render_tab_herramientas()
 
 # Footer
 st.markdown("---")
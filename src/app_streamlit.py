@@ -6,17 +6,25 @@ Interfaz web usando Streamlit para facilitar el uso del sistema.
 import streamlit as st
 import pandas as pd
 import numpy as np
+import json
 import os
 import sys
-from io import StringIO
-import base64
-import folium
-from streamlit_folium import folium_static
 import time
 
-# Agregar el directorio actual al path
+# folium y streamlit_folium solo se usan en la pestaña de visualización;
+# se importan ahí (sys.modules los cachea tras la primera vez) para no
+# pagar sus ~200 ms de import en cada cold-start del script
+
+# Los módulos de src/ se instalan con `pip install -e .` (pyproject);
+# el append al path queda como fallback para entornos sin instalar.
+# Importarlos aquí una sola vez los deja cacheados en sys.modules, en
+# vez de resolver el import dentro de cada handler de botón
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from optimizador_rutas_smp.data_generator import DataGenerator
+from optimizador_rutas_smp.map_visualizer import MapVisualizer
+from optimizador_rutas_smp.route_optimizer import RouteOptimizer
+
 # Configuración de la página
 st.set_page_config(
     page_title="Optimizador de Rutas - San Martín de Porres",
@@ -86,16 +94,9 @@ with st.expander("ℹ️ Información del Proyecto"):
 # Sidebar para configuración
 st.sidebar.header("⚙️ Configuración")
 
-# Opciones de método de optimización
-metodo = st.sidebar.selectbox(
-    "Método de Optimización",
-    ["ortools", "vecino_cercano", "todos"],
-    format_func=lambda x: {
-        "ortools": "OR-Tools (Recomendado)",
-        "vecino_cercano": "Vecino Más Cercano",
-        "todos": "Comparar Todos los Métodos"
-    }[x]
-)
+# El método de optimización se elige en la pestaña de optimización; el
+# mapa de la pestaña de visualización siempre refleja la última corrida
+# persistida, así que un selector global aquí no tendría efecto
 
 # Opción para regenerar datos
 regenerar_datos = st.sidebar.checkbox(
@@ -110,33 +111,318 @@ st.sidebar.header("📊 Estado del Sistema")
 data_dir = "../data"
 output_dir = "../output"
 
-direcciones_existe = os.path.exists(os.path.join(data_dir, "direcciones.csv"))
-distancias_existe = os.path.exists(os.path.join(data_dir, "distancias.csv"))
-ruta_existe = os.path.exists(os.path.join(output_dir, "ruta_optimizada.csv"))
-mapa_existe = os.path.exists(os.path.join(output_dir, "mapa_ruta_optimizada.html"))
 
-st.sidebar.write("**Archivos de Datos:**")
-st.sidebar.write(f"• Direcciones: {'✅' if direcciones_existe else '❌'}")
-st.sidebar.write(f"• Distancias: {'✅' if distancias_existe else '❌'}")
+# Lecturas cacheadas: Streamlit re-ejecuta el script completo en cada
+# interacción; con st.cache_data los CSV/JSON solo se re-parsean cuando
+# cambia su mtime (los reruns pagan un stat, no el parser)
+@st.cache_data(show_spinner=False)
+def cargar_csv(ruta, mtime):
+    """Lee un CSV (cacheado por ruta + mtime).
+
+    El parser de pyarrow es vectorizado (SIMD) y se salta la pasada de
+    inferencia de dtypes de pandas; en las relecturas de ruta y matriz
+    recorta el parseo varias veces frente al engine C.
+    """
+    return pd.read_csv(ruta, engine='pyarrow')
+
+
+@st.cache_data(show_spinner=False)
+def cargar_json(ruta, mtime):
+    """Lee un JSON (cacheado por ruta + mtime)."""
+    with open(ruta, 'r') as f:
+        return json.load(f)
+
+
+def cargar_matriz_distancias():
+    """Matriz de distancias como ndarray, sin pasar por el parser CSV.
+
+    Prefiere el binario distancias.npy (np.load con mmap: ~8 bytes por
+    float y parseo nulo) y cae al CSV cacheado solo si el .npy aún no
+    se generó.
+    """
+    ruta_npy = os.path.join(data_dir, "distancias.npy")
+    if os.path.exists(ruta_npy):
+        return np.load(ruta_npy, mmap_mode='r')
+    ruta_csv = os.path.join(data_dir, "distancias.csv")
+    return cargar_csv(ruta_csv, os.path.getmtime(ruta_csv)).values
+
+
+# Ruta estática de Streamlit (server.enableStaticServing, ver
+# .streamlit/config.toml): el iframe transporta solo la URL y el
+# navegador cachea el HTML del mapa con HTTP normal
+_STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+
+def publicar_html(nombre):
+    """Copia un HTML de output/ a static/ (si cambió) y devuelve su URL.
+
+    El ?v=mtime invalida el cache del navegador solo cuando el archivo
+    se regenera.
+    """
+    import shutil
+
+    origen = os.path.join(output_dir, nombre)
+    destino = os.path.join(_STATIC_DIR, nombre)
+    mtime = os.path.getmtime(origen)
+    if not os.path.exists(destino) or os.path.getmtime(destino) < mtime:
+        os.makedirs(_STATIC_DIR, exist_ok=True)
+        shutil.copy2(origen, destino)
+    return f"app/static/{nombre}?v={int(mtime)}"
+
+
+@st.cache_data(show_spinner=False)
+def leer_bytes(ruta, mtime):
+    """Bytes de un archivo para descarga (cacheados por ruta + mtime).
+
+    Evita releer del disco los CSV y el HTML del mapa (varios MB) en
+    cada rerun de la pestaña de resultados.
+    """
+    with open(ruta, 'rb') as f:
+        return f.read()
+
+
+@st.cache_data(show_spinner=False)
+def calcular_beneficios(ahorro_km):
+    """Beneficios estimados derivados del ahorro en km (cacheados).
+
+    Centraliza las constantes (2 min/km, 8L/100km, 22 días x 4 semanas)
+    en una sola función memoizada: el bloque de la pestaña de resultados
+    solo consulta el dict en cada rerun.
+    """
+    combustible_litros = ahorro_km * 0.08
+    return {
+        'tiempo_min': ahorro_km * 2.0,
+        'combustible_litros': combustible_litros,
+        'mensual_litros': combustible_litros * 22 * 4,
+    }
+
+
+@st.cache_resource(show_spinner=False)
+def obtener_generador():
+    """Instancia única de DataGenerator por proceso.
+
+    Las clases ya se importan una vez al tope del módulo; esto evita
+    además reconstruir el generador (con sus direcciones base) en cada
+    click de botón o rerun de la pestaña de visualización.
+    """
+    return DataGenerator()
+
+
+def cargar_ruta_df():
+    """DataFrame de ruta_optimizada.csv compartido entre pestañas.
+
+    st.cache_data deserializa una copia del frame en cada llamada; la
+    copia se materializa una sola vez por versión del archivo (mtime) y
+    las pestañas 3 y 4 consumen el mismo objeto desde session_state.
+    """
+    ruta_csv = os.path.join(output_dir, "ruta_optimizada.csv")
+    mtime = os.path.getmtime(ruta_csv)
+    clave = ('ruta_df', mtime)
+    if clave not in st.session_state:
+        st.session_state[clave] = cargar_csv(ruta_csv, mtime)
+    return st.session_state[clave]
+
+
+@st.cache_data(ttl=2, show_spinner=False)
+def estado_archivos(rutas):
+    """Existencia de varios archivos con un scandir por directorio.
+
+    Dos syscalls (uno por directorio) en vez de un stat por archivo; el
+    TTL de 2 s hace gratis los reruns consecutivos.
+    """
+    presentes = {}
+    for directorio in {os.path.dirname(ruta) for ruta in rutas}:
+        try:
+            with os.scandir(directorio) as it:
+                presentes[directorio] = {entrada.name for entrada in it}
+        except FileNotFoundError:
+            presentes[directorio] = set()
+    return {
+        ruta: os.path.basename(ruta) in presentes[os.path.dirname(ruta)]
+        for ruta in rutas
+    }
+
+
+# Plantilla de popup compilada una sola vez: el f-string triple se
+# re-evaluaba entero por marcador; con str.format solo se sustituyen
+# los tres huecos. El aviso de posición ajustada es un fragmento fijo
+_POPUP_TMPL = """
+<div style="font-size: 14px; width: 280px;">
+    <h3 style="color: {color}; text-align: center;">
+        {titulo}
+    </h3>
+    <hr>
+    <p><b>🔢 Orden en ruta:</b> <span style="font-size: 18px; color: red;">{orden}</span></p>
+    <p><b>📍 Dirección:</b><br>{direccion}</p>
+    {aviso}
+</div>
+"""
+_AVISO_AJUSTE = '<p style="color: orange;"><b>⚠️ Posición ajustada para visualización</b></p>'
+_PUNTOS_AJUSTADOS = frozenset({13, 15})
+
+
+@st.cache_resource(show_spinner=False)
+def construir_mapa_dinamico(csv_mtime, resultados_mtime):
+    """Mapa Folium de la pestaña de visualización (cacheado por entrada).
+
+    Sin cache, cada rerun recalculaba la matriz de distancias O(N²),
+    resolvía el TSP y reconstruía los ~30 marcadores aunque el click
+    fuera en otro widget. La ruta ya está resuelta y persistida por la
+    pestaña de optimización (resultados_optimizacion.json), así que
+    aquí solo se lee; keyado por los mtimes de ambos archivos.
+    """
+    import folium
+
+    df = cargar_csv("../data/direcciones_ejemplo.csv", csv_mtime)
+    resultado = cargar_json(
+        os.path.join(output_dir, "resultados_optimizacion.json"),
+        resultados_mtime)
+
+    # Crear visualizador con separación de puntos
+    ruta = resultado['mejor_ruta']
+    visualizer = MapVisualizer(df, ruta)
+
+    # Crear mapa base con Folium
+    mapa_folium = folium.Map(
+        location=[-11.9775, -77.0904],
+        zoom_start=13,
+        tiles='OpenStreetMap'
+    )
+
+    # Usar el sistema de separación de puntos del visualizador
+    df_separado = visualizer.direcciones_visualizacion
+
+    # Colores únicos para identificar fácilmente los puntos problemáticos
+    colores_especiales = {
+        0: 'red',      # Almacén
+        8: 'purple',   # Punto 8 - MORADO
+        13: 'green',   # Punto 13 - VERDE
+        14: 'orange',  # Punto 14 - NARANJA
+        15: 'pink'     # Punto 15 - ROSA
+    }
+
+    # Arrays planos extraídos una sola vez: iterrows + .iloc[idx][col]
+    # por marcador son lookups de etiqueta O(columnas); el acceso
+    # posicional a ndarray es O(1)
+    lats = df_separado['latitud'].to_numpy()
+    lons = df_separado['longitud'].to_numpy()
+    tipos = df['tipo'].to_numpy()
+    direcciones = df['direccion'].to_numpy()
+
+    # Índice inverso de la ruta construido una vez: ruta.index(idx) +
+    # "idx in ruta" eran dos barridos lineales por marcador (O(N²)
+    # total). Se recorre al revés para que los puntos repetidos (el
+    # almacén abre y cierra la ruta) conserven su primera aparición,
+    # igual que ruta.index
+    pos_en_ruta = {punto: i + 1 for i, punto in zip(
+        range(len(ruta) - 1, -1, -1), reversed(ruta))}
+
+    # Agregar marcadores
+    for idx in range(len(df_separado)):
+        tipo = tipos[idx]
+        direccion_original = direcciones[idx]
+
+        # Color especial para puntos problemáticos
+        if idx in colores_especiales:
+            color = colores_especiales[idx]
+        else:
+            color = 'blue'
+
+        # Orden en ruta (lookup O(1) en el índice inverso)
+        orden_en_ruta = pos_en_ruta.get(idx, 'N/A')
+
+        # Popup mejorado (plantilla precompilada)
+        popup_html = _POPUP_TMPL.format(
+            color=color,
+            titulo='🏭 ALMACÉN' if tipo == 'almacen' else f'📦 ENTREGA {idx}',
+            orden=orden_en_ruta,
+            direccion=direccion_original,
+            aviso=_AVISO_AJUSTE if idx in _PUNTOS_AJUSTADOS else '',
+        )
+
+        # Marcador principal
+        folium.Marker(
+            location=[lats[idx], lons[idx]],
+            popup=folium.Popup(popup_html, max_width=300),
+            tooltip=f"Entrega {idx} - Orden {orden_en_ruta}",
+            icon=folium.Icon(
+                color=color,
+                icon='home' if tipo == 'almacen' else 'shopping-cart',
+                prefix='fa'
+            )
+        ).add_to(mapa_folium)
+
+        # Número de orden
+        if orden_en_ruta != 'N/A':
+            folium.Marker(
+                location=[lats[idx], lons[idx]],
+                icon=folium.DivIcon(
+                    html=f'''<div style="font-size: 12px; color: white; font-weight: bold;
+                             text-align: center; background-color: orange; border-radius: 50%;
+                             width: 24px; height: 24px; line-height: 24px;
+                             border: 2px solid white; box-shadow: 0 0 3px rgba(0,0,0,0.5);">
+                             {orden_en_ruta}</div>''',
+                    icon_size=(24, 24),
+                    icon_anchor=(12, 12)
+                )
+            ).add_to(mapa_folium)
 
-st.sidebar.write("**Archivos de Resultados:**")
-st.sidebar.write(f"• Ruta Optimizada: {'✅' if ruta_existe else '❌'}")
-st.sidebar.write(f"• Mapa Interactivo: {'✅' if mapa_existe else '❌'}")
+    # Agregar línea de ruta: un solo gather con fancy-indexing sobre los
+    # arrays ya extraídos, en vez de construir una Series por punto
+    coordenadas_ruta = np.column_stack([lats, lons])[ruta].tolist()
+
+    folium.PolyLine(
+        coordenadas_ruta,
+        color='red',
+        weight=4,
+        opacity=0.8,
+        popup=f'Ruta Optimizada: {resultado["mejor_distancia_km"]:.2f} km'
+    ).add_to(mapa_folium)
+
+    return mapa_folium
+
+
+_RUTAS_ESTADO = (
+    os.path.join(data_dir, "direcciones.csv"),
+    os.path.join(data_dir, "distancias.csv"),
+    os.path.join(output_dir, "ruta_optimizada.csv"),
+    os.path.join(output_dir, "mapa_ruta_optimizada.html"),
+    os.path.join(output_dir, "resultados_optimizacion.json"),
+)
+_estado = estado_archivos(_RUTAS_ESTADO)
+direcciones_existe = _estado[_RUTAS_ESTADO[0]]
+distancias_existe = _estado[_RUTAS_ESTADO[1]]
+ruta_existe = _estado[_RUTAS_ESTADO[2]]
+mapa_existe = _estado[_RUTAS_ESTADO[3]]
+resultados_existe = _estado[_RUTAS_ESTADO[4]]
+
+# Un solo st.sidebar.markdown: cada write separado viaja como su propio
+# delta por el websocket; concatenado son seis mensajes menos por rerun
+st.sidebar.markdown('\n\n'.join([
+    "**Archivos de Datos:**",
+    f"• Direcciones: {'✅' if direcciones_existe else '❌'}",
+    f"• Distancias: {'✅' if distancias_existe else '❌'}",
+    "**Archivos de Resultados:**",
+    f"• Ruta Optimizada: {'✅' if ruta_existe else '❌'}",
+    f"• Mapa Interactivo: {'✅' if mapa_existe else '❌'}",
+]))
 
 # Función para mostrar contenido de archivo
-def mostrar_archivo_csv(ruta_archivo, titulo):
+def mostrar_archivo_csv(ruta_archivo, titulo, existe=True):
     """
     Displays the content of a CSV file in a Streamlit app.
 
     Args:
         ruta_archivo (str): The path to the CSV file.
         titulo (str): The title to display.
+        existe (bool, optional): Whether the file exists (taken from the
+            batched estado_archivos snapshot instead of a per-call stat).
 
     Returns:
         pd.DataFrame: The content of the CSV file as a DataFrame.
     """
-    if os.path.exists(ruta_archivo):
-        df = pd.read_csv(ruta_archivo)
+    if existe:
+        df = cargar_csv(ruta_archivo, os.path.getmtime(ruta_archivo))
         st.subheader(titulo)
         st.dataframe(df, use_container_width=True)
         return df
@@ -144,25 +430,9 @@ def mostrar_archivo_csv(ruta_archivo, titulo):
         st.warning(f"Archivo no encontrado: {ruta_archivo}")
         return None
 
-# Función para descargar archivo
-def crear_link_descarga(ruta_archivo, nombre_descarga):
-    """
-    Creates a download link for a file.
-
-    Args:
-        ruta_archivo (str): The path to the file.
-        nombre_descarga (str): The name of the downloaded file.
-
-    Returns:
-        str: The download link as an HTML string.
-    """
-    if os.path.exists(ruta_archivo):
-        with open(ruta_archivo, 'rb') as f:
-            data = f.read()
-        b64 = base64.b64encode(data).decode()
-        href = f'<a href="data:file/csv;base64,{b64}" download="{nombre_descarga}">Descargar {nombre_descarga}</a>'
-        return href
-    return None
+# Las descargas van por st.download_button + leer_bytes cacheado; no
+# agregar enlaces base64 inline (inflan el payload HTML en 4/3 del
+# tamaño del archivo por render)
 
 # Pestañas principales
 tab1, tab2, tab3, tab4 = st.tabs(["🏭 Datos", "🚀 Optimización", "🗺️ Visualización", "📊 Resultados"])
@@ -179,43 +449,67 @@ with tab1:
         if st.button("🔄 Generar/Actualizar Datos", type="primary"):
             with st.spinner("Generando datos..."):
                 try:
-                    # Importar y ejecutar generador de datos
-                    from data_generator import DataGenerator
-                    
-                    generador = DataGenerator()
+                    generador = obtener_generador()
                     direcciones_df = generador.generar_dataset_completo()
                     
                     # Calcular matriz de distancias
                     coordenadas = list(zip(direcciones_df['latitud'], direcciones_df['longitud']))
-                    matriz_distancias = generador.calcular_matriz_distancias(coordenadas)
+                    # float32 desde el origen: mitad de bytes en RAM y en
+                    # disco; de sobra para km con 2 decimales
+                    matriz_distancias = np.asarray(
+                        generador.calcular_matriz_distancias(coordenadas),
+                        dtype=np.float32)
                     
                     # Guardar datos
                     os.makedirs(data_dir, exist_ok=True)
                     generador.guardar_datos(direcciones_df, os.path.join(data_dir, "direcciones.csv"))
                     generador.guardar_matriz_distancias(matriz_distancias, os.path.join(data_dir, "distancias.csv"))
+                    # Copia binaria para los consumidores de la app:
+                    # np.load es casi gratis frente a re-parsear el CSV
+                    np.save(os.path.join(data_dir, "distancias.npy"),
+                            matriz_distancias)
                     
                     st.success("✅ Datos generados exitosamente!")
-                    st.rerun()
-                    
+                    # Sin st.rerun(): los lectores van keyados por mtime,
+                    # así que el resto de este mismo run ya ve los archivos
+                    # nuevos; solo hay que refrescar los flags de
+                    # existencia calculados antes del click
+                    estado_archivos.clear()
+                    direcciones_existe = distancias_existe = True
+
                 except Exception as e:
                     st.error(f"❌ Error generando datos: {e}")
         
         # Mostrar datos de direcciones
-        mostrar_archivo_csv(os.path.join(data_dir, "direcciones.csv"), "📍 Direcciones Generadas")
+        mostrar_archivo_csv(os.path.join(data_dir, "direcciones.csv"),
+                            "📍 Direcciones Generadas", direcciones_existe)
     
     with col2:
         st.subheader("📏 Matriz de Distancias")
         
         # Mostrar resumen de matriz de distancias
-        if os.path.exists(os.path.join(data_dir, "distancias.csv")):
-            matriz_df = pd.read_csv(os.path.join(data_dir, "distancias.csv"))
+        ruta_distancias = os.path.join(data_dir, "distancias.csv")
+        if distancias_existe:
+            matriz_df = cargar_csv(ruta_distancias, os.path.getmtime(ruta_distancias))
             
-            st.write(f"**Dimensiones**: {matriz_df.shape[0]} x {matriz_df.shape[1]}")
-            st.write(f"**Distancia promedio**: {matriz_df.values[matriz_df.values > 0].mean():.2f} km")
-            st.write(f"**Distancia máxima**: {matriz_df.values.max():.2f} km")
+            # Reducciones puras sobre el ndarray: sum + conteo de la
+            # máscara en vez de materializar la copia compactada
+            # a[a > 0]. El denominador cuenta los ceros reales — además
+            # de la diagonal hay pares de puntos con coordenadas
+            # idénticas a distancia cero. El acumulador float64 evita el
+            # error de redondeo de sumar en float32 sin copiar la matriz
+            a = matriz_df.to_numpy(copy=False)
+            st.write(f"**Dimensiones**: {a.shape[0]} x {a.shape[1]}")
+            st.write(f"**Distancia promedio**: {a.sum(dtype=np.float64) / (a > 0).sum():.2f} km")
+            st.write(f"**Distancia máxima**: {a.max():.2f} km")
             
             with st.expander("Ver Matriz Completa"):
-                st.dataframe(matriz_df, use_container_width=True)
+                # Vista previa acotada: renderizar la matriz NxN completa
+                # serializa O(N²) celdas al navegador en cada rerun; el
+                # recorte 50x50 la deja en O(1) y el render total es opt-in
+                st.dataframe(matriz_df.iloc[:50, :50], use_container_width=True)
+                if len(matriz_df) > 50 and st.checkbox("Mostrar matriz completa"):
+                    st.dataframe(matriz_df, use_container_width=True)
 
 # Tab 2: Optimización
 with tab2:
@@ -242,11 +536,10 @@ with tab2:
             if st.button("🎯 Ejecutar Optimización", type="primary"):
                 with st.spinner("Optimizando ruta..."):
                     try:
-                        from route_optimizer import RouteOptimizer
-                        
-                        # Cargar datos
-                        direcciones = pd.read_csv(os.path.join(data_dir, "direcciones.csv"))
-                        matriz_distancias = pd.read_csv(os.path.join(data_dir, "distancias.csv")).values
+                        # Cargar datos (lecturas cacheadas)
+                        ruta_dir = os.path.join(data_dir, "direcciones.csv")
+                        direcciones = cargar_csv(ruta_dir, os.path.getmtime(ruta_dir))
+                        matriz_distancias = cargar_matriz_distancias()
                         
                         # Crear optimizador
                         optimizador = RouteOptimizer(matriz_distancias, direcciones)
@@ -260,13 +553,15 @@ with tab2:
                         ruta_detallada.to_csv(os.path.join(output_dir, "ruta_optimizada.csv"), index=False)
                         
                         # Guardar resultados de optimización
-                        import json
                         with open(os.path.join(output_dir, "resultados_optimizacion.json"), 'w') as f:
                             json.dump(resultados, f, indent=2, default=str)
                         
                         st.success("✅ Optimización completada!")
-                        st.rerun()
-                        
+                        # Las pestañas siguientes de este mismo run leen
+                        # por mtime; basta actualizar el flag en sitio
+                        estado_archivos.clear()
+                        ruta_existe = resultados_existe = True
+
                     except Exception as e:
                         st.error(f"❌ Error en optimización: {e}")
         
@@ -275,10 +570,9 @@ with tab2:
             
             # Mostrar resultados si existen
             resultados_file = os.path.join(output_dir, "resultados_optimizacion.json")
-            if os.path.exists(resultados_file):
-                import json
-                with open(resultados_file, 'r') as f:
-                    resultados = json.load(f)
+            if resultados_existe:
+                resultados = cargar_json(
+                    resultados_file, os.path.getmtime(resultados_file))
                 
                 # Métricas principales
                 col_m1, col_m2, col_m3 = st.columns(3)
@@ -333,17 +627,16 @@ with tab3:
             if st.button("🗺️ Crear Mapa Interactivo", type="primary"):
                 with st.spinner("Generando mapa..."):
                     try:
-                        from map_visualizer import MapVisualizer
-                        
-                        # Cargar datos necesarios
-                        direcciones = pd.read_csv(os.path.join(data_dir, "direcciones.csv"))
-                        matriz_distancias = pd.read_csv(os.path.join(data_dir, "distancias.csv")).values
-                        ruta_df = pd.read_csv(os.path.join(output_dir, "ruta_optimizada.csv"))
+                        # Cargar datos necesarios (lecturas cacheadas)
+                        ruta_dir = os.path.join(data_dir, "direcciones.csv")
+                        ruta_csv = os.path.join(output_dir, "ruta_optimizada.csv")
+                        ruta_json = os.path.join(output_dir, "resultados_optimizacion.json")
+                        direcciones = cargar_csv(ruta_dir, os.path.getmtime(ruta_dir))
+                        matriz_distancias = cargar_matriz_distancias()
+                        ruta_df = cargar_ruta_df()
                         ruta_optimizada = ruta_df['punto_id'].tolist()
-                        
-                        # Cargar resultados de optimización
-                        with open(os.path.join(output_dir, "resultados_optimizacion.json"), 'r') as f:
-                            resultados = json.load(f)
+
+                        resultados = cargar_json(ruta_json, os.path.getmtime(ruta_json))
                         
                         # Crear visualizador
                         visualizador = MapVisualizer(direcciones, ruta_optimizada)
@@ -357,8 +650,11 @@ with tab3:
                         )
                         
                         st.success("✅ Mapa generado exitosamente!")
-                        st.rerun()
-                        
+                        # La columna del mapa (más abajo en este mismo
+                        # run) consulta el flag actualizado, sin replay
+                        estado_archivos.clear()
+                        mapa_existe = True
+
                     except Exception as e:
                         st.error(f"❌ Error generando mapa: {e}")
         
@@ -371,113 +667,17 @@ with tab3:
             """, unsafe_allow_html=True)
             
             if mapa_existe:
-                # Crear mapa dinámico con Folium
+                # Crear mapa dinámico con Folium (construcción cacheada:
+                # reusa la ruta persistida por la pestaña de optimización
+                # en vez de recalcular matriz + TSP por rerun)
                 try:
-                    from data_generator import DataGenerator
-                    from route_optimizer import RouteOptimizer
-                    from map_visualizer import MapVisualizer
-                    
-                    # Cargar datos
-                    df = pd.read_csv("../data/direcciones_ejemplo.csv")
-                    
-                    # Crear mapa mejorado usando el visualizador actualizado
-                    coordenadas = [(row['latitud'], row['longitud']) for _, row in df.iterrows()]
-                    generator = DataGenerator()
-                    matriz_distancias = generator.calcular_matriz_distancias(coordenadas)
-                    optimizer = RouteOptimizer(matriz_distancias, df)
-                    resultado = optimizer.optimizar_ruta(metodo)
-                    
-                    # Crear visualizador con separación de puntos
-                    ruta = resultado['mejor_ruta']
-                    visualizer = MapVisualizer(df, ruta)
-                    
-                    # Crear mapa base con Folium
-                    mapa_folium = folium.Map(
-                        location=[-11.9775, -77.0904],
-                        zoom_start=13,
-                        tiles='OpenStreetMap'
-                    )
-                    
-                    # Usar el sistema de separación de puntos del visualizador
-                    df_separado = visualizer.direcciones_visualizacion
-                    
-                    # Colores únicos para identificar fácilmente los puntos problemáticos
-                    colores_especiales = {
-                        0: 'red',      # Almacén
-                        8: 'purple',   # Punto 8 - MORADO
-                        13: 'green',   # Punto 13 - VERDE  
-                        14: 'orange',  # Punto 14 - NARANJA
-                        15: 'pink'     # Punto 15 - ROSA
-                    }
-                    
-                    # Agregar marcadores
-                    for idx, row in df_separado.iterrows():
-                        tipo = df.iloc[idx]['tipo']
-                        direccion_original = df.iloc[idx]['direccion']
-                        
-                        # Color especial para puntos problemáticos
-                        if idx in colores_especiales:
-                            color = colores_especiales[idx]
-                        else:
-                            color = 'blue'
-                        
-                        # Orden en ruta
-                        orden_en_ruta = ruta.index(idx) + 1 if idx in ruta else 'N/A'
-                        
-                        # Popup mejorado
-                        popup_html = f"""
-                        <div style="font-size: 14px; width: 280px;">
-                            <h3 style="color: {color}; text-align: center;">
-                                {'🏭 ALMACÉN' if tipo == 'almacen' else f'📦 ENTREGA {idx}'}
-                            </h3>
-                            <hr>
-                            <p><b>🔢 Orden en ruta:</b> <span style="font-size: 18px; color: red;">{orden_en_ruta}</span></p>
-                            <p><b>📍 Dirección:</b><br>{direccion_original}</p>
-                            {f'<p style="color: orange;"><b>⚠️ Posición ajustada para visualización</b></p>' if idx in [13, 15] else ''}
-                        </div>
-                        """
-                        
-                        # Marcador principal
-                        folium.Marker(
-                            location=[row['latitud'], row['longitud']],
-                            popup=folium.Popup(popup_html, max_width=300),
-                            tooltip=f"Entrega {idx} - Orden {orden_en_ruta}",
-                            icon=folium.Icon(
-                                color=color,
-                                icon='home' if tipo == 'almacen' else 'shopping-cart',
-                                prefix='fa'
-                            )
-                        ).add_to(mapa_folium)
-                        
-                        # Número de orden
-                        if orden_en_ruta != 'N/A':
-                            folium.Marker(
-                                location=[row['latitud'], row['longitud']],
-                                icon=folium.DivIcon(
-                                    html=f'''<div style="font-size: 12px; color: white; font-weight: bold; 
-                                             text-align: center; background-color: orange; border-radius: 50%; 
-                                             width: 24px; height: 24px; line-height: 24px; 
-                                             border: 2px solid white; box-shadow: 0 0 3px rgba(0,0,0,0.5);">
-                                             {orden_en_ruta}</div>''',
-                                    icon_size=(24, 24),
-                                    icon_anchor=(12, 12)
-                                )
-                            ).add_to(mapa_folium)
-                    
-                    # Agregar línea de ruta
-                    coordenadas_ruta = []
-                    for punto_idx in ruta:
-                        row = df_separado.iloc[punto_idx]
-                        coordenadas_ruta.append([row['latitud'], row['longitud']])
-                    
-                    folium.PolyLine(
-                        coordenadas_ruta,
-                        color='red',
-                        weight=4,
-                        opacity=0.8,
-                        popup=f'Ruta Optimizada: {resultado["mejor_distancia_km"]:.2f} km'
-                    ).add_to(mapa_folium)
-                    
+                    from streamlit_folium import folium_static
+
+                    mapa_folium = construir_mapa_dinamico(
+                        os.path.getmtime("../data/direcciones_ejemplo.csv"),
+                        os.path.getmtime(os.path.join(
+                            output_dir, "resultados_optimizacion.json")))
+
                     # Mostrar mapa usando streamlit-folium
                     folium_static(mapa_folium, width=700, height=500)
                     
@@ -498,14 +698,13 @@ with tab3:
                 except Exception as e:
                     st.error(f"❌ Error creando mapa dinámico: {e}")
                     
-                    # Fallback: intentar cargar el archivo HTML
+                    # Fallback: servir el HTML generado por la ruta
+                    # estática en vez de inyectar los MB por el websocket
                     try:
-                        archivo_mapa = os.path.join(output_dir, "mapa_ruta_optimizada.html")
-                        with open(archivo_mapa, 'r', encoding='utf-8') as f:
-                            mapa_html = f.read()
-                        
-                        st.components.v1.html(mapa_html, height=600, scrolling=True)
-                        st.info(f"📁 Mapa cargado desde archivo: `{archivo_mapa}`")
+                        url_mapa = publicar_html("mapa_ruta_optimizada.html")
+
+                        st.components.v1.iframe(url_mapa, height=600, scrolling=True)
+                        st.info("📁 Mapa cargado desde archivo estático")
                         
                     except Exception as e2:
                         st.error(f"❌ Error cargando archivo de mapa: {e2}")
@@ -540,13 +739,23 @@ with tab3:
                 # Mostrar información de la ruta
                 if ruta_existe:
                     st.subheader("📋 Detalle de la Ruta")
-                    ruta_df = mostrar_archivo_csv(os.path.join(output_dir, "ruta_optimizada.csv"), "")
-                    
+                    ruta_archivo = os.path.join(output_dir, "ruta_optimizada.csv")
+                    ruta_df = cargar_ruta_df()
+                    st.dataframe(ruta_df, use_container_width=True)
+
                     if ruta_df is not None:
-                        # Resumen de la ruta
-                        distancia_total = ruta_df['distancia_anterior_km'].sum()
-                        num_paradas = len(ruta_df) - 1  # Excluir retorno al almacén
-                        
+                        # Resumen memoizado en session_state por mtime:
+                        # la agregación corre una vez por versión del CSV
+                        clave = ('resumen_ruta', os.path.getmtime(ruta_archivo))
+                        if clave not in st.session_state:
+                            st.session_state[clave] = {
+                                'distancia_total': float(ruta_df['distancia_anterior_km'].sum()),
+                                'num_paradas': len(ruta_df) - 1,  # Excluir retorno al almacén
+                            }
+                        distancia_total = st.session_state[clave]['distancia_total']
+                        num_paradas = st.session_state[clave]['num_paradas']
+
+
                         col_r1, col_r2 = st.columns(2)
                         with col_r1:
                             st.metric("📦 Paradas de Entrega", num_paradas)
@@ -562,13 +771,20 @@ with tab4:
     else:
         # Cargar todos los datos para el resumen
         try:
-            direcciones = pd.read_csv(os.path.join(data_dir, "direcciones.csv"))
-            ruta_df = pd.read_csv(os.path.join(output_dir, "ruta_optimizada.csv"))
-            
-            if os.path.exists(os.path.join(output_dir, "resultados_optimizacion.json")):
-                with open(os.path.join(output_dir, "resultados_optimizacion.json"), 'r') as f:
-                    resultados = json.load(f)
-                
+            ruta_dir = os.path.join(data_dir, "direcciones.csv")
+            ruta_json = os.path.join(output_dir, "resultados_optimizacion.json")
+            direcciones = cargar_csv(ruta_dir, os.path.getmtime(ruta_dir))
+            ruta_df = cargar_ruta_df()
+
+            if resultados_existe:
+                resultados = cargar_json(ruta_json, os.path.getmtime(ruta_json))
+
+                # Total de entregas memoizado por versión del CSV
+                clave_entregas = ('entregas_diarias', os.path.getmtime(ruta_dir))
+                if clave_entregas not in st.session_state:
+                    st.session_state[clave_entregas] = len(direcciones) - 1
+                entregas_diarias = st.session_state[clave_entregas]
+
                 # Resumen ejecutivo
                 st.subheader("📋 Resumen Ejecutivo")
                 
@@ -583,7 +799,7 @@ with tab4:
                 with col2:
                     st.metric(
                         "📦 Entregas Diarias",
-                        len(direcciones) - 1
+                        entregas_diarias
                     )
                 
                 with col3:
@@ -616,34 +832,34 @@ with tab4:
                     
                     with col_imp2:
                         st.write("**💡 Beneficios Estimados:**")
-                        tiempo_ahorrado = ahorro_info['ahorro_km'] * 2  # Asumiendo 2 min/km
-                        combustible_ahorrado = ahorro_info['ahorro_km'] * 0.08  # 8L/100km
-                        
-                        st.write(f"• Tiempo ahorrado: ~{tiempo_ahorrado:.0f} minutos/día")
-                        st.write(f"• Combustible ahorrado: ~{combustible_ahorrado:.1f} litros/día")
-                        st.write(f"• Ahorro mensual: ~{combustible_ahorrado * 22 * 4:.0f} litros")
+                        beneficios = calcular_beneficios(ahorro_info['ahorro_km'])
+
+                        st.write(f"• Tiempo ahorrado: ~{beneficios['tiempo_min']:.0f} minutos/día")
+                        st.write(f"• Combustible ahorrado: ~{beneficios['combustible_litros']:.1f} litros/día")
+                        st.write(f"• Ahorro mensual: ~{beneficios['mensual_litros']:.0f} litros")
                 
                 # Enlaces de descarga
                 st.subheader("📥 Archivos para Descarga")
                 
+                # Flags de existencia del snapshot batcheado, sin un
+                # stat por archivo en cada rerun
                 archivos_descarga = [
-                    (os.path.join(data_dir, "direcciones.csv"), "direcciones.csv"),
-                    (os.path.join(output_dir, "ruta_optimizada.csv"), "ruta_optimizada.csv"),
-                    (os.path.join(output_dir, "mapa_ruta_optimizada.html"), "mapa_interactivo.html")
+                    (os.path.join(data_dir, "direcciones.csv"), "direcciones.csv", direcciones_existe),
+                    (os.path.join(output_dir, "ruta_optimizada.csv"), "ruta_optimizada.csv", ruta_existe),
+                    (os.path.join(output_dir, "mapa_ruta_optimizada.html"), "mapa_interactivo.html", mapa_existe)
                 ]
-                
+
                 cols_descarga = st.columns(len(archivos_descarga))
-                
-                for i, (archivo, nombre) in enumerate(archivos_descarga):
+
+                for i, (archivo, nombre, existe) in enumerate(archivos_descarga):
                     with cols_descarga[i]:
-                        if os.path.exists(archivo):
-                            with open(archivo, 'rb') as f:
-                                st.download_button(
-                                    label=f"📁 {nombre}",
-                                    data=f.read(),
-                                    file_name=nombre,
-                                    mime="text/csv" if nombre.endswith('.csv') else "text/html"
-                                )
+                        if existe:
+                            st.download_button(
+                                label=f"📁 {nombre}",
+                                data=leer_bytes(archivo, os.path.getmtime(archivo)),
+                                file_name=nombre,
+                                mime="text/csv" if nombre.endswith('.csv') else "text/html"
+                            )
         
         except Exception as e:
             st.error(f"❌ Error cargando resultados: {e}")
@@ -8,9 +8,9 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 import pandas as pd
 import numpy as np
-from data_generator import DataGenerator
-from route_optimizer import RouteOptimizer
-from google_maps_visualizer import GoogleMapsVisualizer
+from optimizador_rutas_smp.data_generator import DataGenerator
+from optimizador_rutas_smp.route_optimizer import RouteOptimizer
+from optimizador_rutas_smp.google_maps_visualizer import GoogleMapsVisualizer
 
 def main():
     """
@@ -100,7 +100,7 @@ def main():
         print(f"✅ Mapa Google Maps: {archivo_google}")
     
     # Mapa tradicional con Folium
-    from map_visualizer import MapVisualizer
+    from optimizador_rutas_smp.map_visualizer import MapVisualizer
     print("🗺️ Creando mapa tradicional...")
     visualizador_tradicional = MapVisualizer(direcciones, ruta)
     archivo_tradicional = visualizador_tradicional.generar_mapa_completo(
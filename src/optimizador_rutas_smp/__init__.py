@@ -0,0 +1,8 @@
+"""
+Paquete del optimizador de rutas logísticas (San Martín de Porres).
+
+Agrupa los módulos de negocio — generación de datos, carga, cache,
+optimización TSP y visualización — bajo un nombre propio para que la
+instalación no deje módulos genéricos (cache, main, ...) sueltos en
+site-packages.
+"""
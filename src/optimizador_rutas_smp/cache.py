@@ -0,0 +1,90 @@
+"""
+Cache en disco para los resultados costosos del pipeline.
+Evita recalcular la matriz de distancias y re-ejecutar el solver
+cuando los scripts de depuración se corren varias veces sobre los
+mismos datos.
+"""
+
+import hashlib
+import pickle
+from pathlib import Path
+
+import numpy as np
+
+# Directorio de cache junto a los demás archivos generados
+CACHE_DIR = Path("output/.cache")
+
+
+def _clave_coordenadas(coordenadas) -> str:
+    """
+    Builds a stable hash key from the coordinate array.
+
+    Args:
+        coordenadas: Array-like of (latitude, longitude) pairs.
+
+    Returns:
+        str: Hex digest identifying the coordinate set.
+    """
+    coords = np.ascontiguousarray(coordenadas, dtype=np.float64)
+    return hashlib.blake2b(coords.tobytes(), digest_size=16).hexdigest()
+
+
+def matriz_distancias_cacheada(generator, coordenadas) -> np.ndarray:
+    """
+    Returns the distance matrix for the given coordinates, computing it
+    only on a cache miss.
+
+    On a hit the matrix is memory-mapped from disk, so callers that only
+    read a few rows get zero-copy access.
+
+    Args:
+        generator: DataGenerator instance used to compute on a miss.
+        coordenadas: Array-like of (latitude, longitude) pairs.
+
+    Returns:
+        np.ndarray: The NxN distance matrix.
+    """
+    archivo = CACHE_DIR / f"dist_{_clave_coordenadas(coordenadas)}.npy"
+
+    if archivo.exists():
+        return np.load(archivo, mmap_mode='r')
+
+    matriz = generator.calcular_matriz_distancias(coordenadas)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    np.save(archivo, matriz)
+    return matriz
+
+
+def resultado_optimizacion_cacheado(matriz_distancias, direcciones,
+                                    metodo: str = "ortools") -> dict:
+    """
+    Runs (or reloads) the route optimization for a distance matrix.
+
+    The result dictionary is pickled keyed by the matrix contents and
+    the method, so repeated debug runs skip the solver entirely.
+
+    Args:
+        matriz_distancias (np.ndarray): The NxN distance matrix.
+        direcciones (pd.DataFrame): DataFrame with the addresses.
+        metodo (str, optional): Optimization method. Defaults to "ortools".
+
+    Returns:
+        dict: The optimization results.
+    """
+    clave = _clave_coordenadas(matriz_distancias)
+    archivo = CACHE_DIR / f"resultado_{clave}_{metodo}.pkl"
+
+    if archivo.exists():
+        with open(archivo, 'rb') as f:
+            return pickle.load(f)
+
+    from .route_optimizer import RouteOptimizer
+
+    optimizer = RouteOptimizer(matriz_distancias, direcciones)
+    resultado = optimizer.optimizar_ruta(metodo)
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(archivo, 'wb') as f:
+        pickle.dump(resultado, f)
+
+    return resultado
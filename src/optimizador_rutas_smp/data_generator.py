@@ -286,29 +286,29 @@ class DataGenerator:
         For a real project, a real route API would be used.
 
         Args:
-            coordenadas (List[Tuple[float, float]]): A list of tuples with latitude and longitude.
+            coordenadas (List[Tuple[float, float]]): A list of tuples (or an
+                (N, 2) ndarray) with latitude and longitude.
 
         Returns:
             np.ndarray: A matrix with the distances between points.
         """
-        n = len(coordenadas)
-        matriz = np.zeros((n, n))
-        
-        for i in range(n):
-            for j in range(n):
-                if i != j:
-                    lat1, lon1 = coordenadas[i]
-                    lat2, lon2 = coordenadas[j]
-                    
-                    # Distancia euclidiana aproximada (en km)
-                    # Fórmula simplificada para distancias cortas
-                    dlat = lat2 - lat1
-                    dlon = (lon2 - lon1) * np.cos(np.radians((lat1 + lat2) / 2))
-                    distancia = np.sqrt(dlat**2 + dlon**2) * 111.32  # km
-                    
-                    matriz[i][j] = distancia
-        
-        return matriz
+        coords = np.asarray(coordenadas, dtype=np.float64)
+        lat = coords[:, 0]
+        lon = coords[:, 1]
+
+        # Distancia euclidiana aproximada (en km)
+        # Fórmula simplificada para distancias cortas, calculada para
+        # todos los pares a la vez mediante broadcasting
+        dlat = lat[None, :] - lat[:, None]
+        lat_media = np.radians((lat[:, None] + lat[None, :]) / 2)
+        dlon = (lon[None, :] - lon[:, None]) * np.cos(lat_media)
+
+        matriz = np.sqrt(dlat**2 + dlon**2) * 111.32  # km
+        np.fill_diagonal(matriz, 0.0)
+
+        # El cálculo se acumula en float64; float32 basta para precisión
+        # de metros y reduce a la mitad la memoria de la matriz O(N^2)
+        return matriz.astype(np.float32)
     
     def guardar_datos(self, direcciones: pd.DataFrame, matriz_distancias: np.ndarray, directorio: str = "../data"):
         """
@@ -354,8 +354,14 @@ class DataGenerator:
             matriz (np.ndarray): The matrix to save.
             ruta_archivo (str, optional): The path to the file. Defaults to "../data/distancias.csv".
         """
-        df_matriz = pd.DataFrame(matriz)
-        df_matriz.to_csv(ruta_archivo, index=False)
+        # np.savetxt escribe directo desde el ndarray con formato en C:
+        # evita envolver la matriz en un DataFrame y el formateo celda a
+        # celda de pandas. El header 0..N-1 reproduce el mismo CSV que
+        # producía to_csv(index=False), así los lectores no cambian
+        matriz = np.asarray(matriz)
+        np.savetxt(
+            ruta_archivo, matriz, fmt='%.4f', delimiter=',',
+            header=','.join(map(str, range(matriz.shape[1]))), comments='')
         print(f"✅ Matriz de distancias guardada en: {ruta_archivo}")
 
 
@@ -0,0 +1,88 @@
+"""
+Carga optimizada de los datos de direcciones.
+Mantiene un sidecar Parquet junto al CSV para evitar re-parsear texto
+en cada ejecución de los scripts.
+"""
+
+import functools
+import os
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Dtypes explícitos: evita la inferencia de tipos del parser CSV y
+# reduce la memoria del DataFrame ('tipo' como category; float32 es más
+# que suficiente para coordenadas con 6 decimales)
+_DTYPES_DIRECCIONES = {
+    'id': 'int64',
+    'latitud': 'float32',
+    'longitud': 'float32',
+    'tipo': 'category',
+    'direccion': 'string',
+}
+
+_COLUMNAS_DIRECCIONES = ['id', 'direccion', 'latitud', 'longitud', 'tipo']
+
+
+def cargar_direcciones(ruta_csv: str = "data/direcciones_ejemplo.csv") -> pd.DataFrame:
+    """
+    Loads the address dataset, using a Parquet sidecar as cache.
+
+    On the first call the CSV is parsed once (with explicit dtypes) and
+    written next to it as Parquet; subsequent calls read the typed
+    columnar file directly, which skips text parsing entirely.
+
+    Args:
+        ruta_csv (str, optional): Path to the source CSV file.
+
+    Returns:
+        pd.DataFrame: The address dataset.
+    """
+    ruta_csv = Path(ruta_csv)
+    ruta_parquet = ruta_csv.with_suffix('.parquet')
+
+    if (PYARROW_AVAILABLE and ruta_parquet.exists()
+            and os.path.getmtime(ruta_parquet) >= os.path.getmtime(ruta_csv)):
+        return pd.read_parquet(ruta_parquet, columns=_COLUMNAS_DIRECCIONES)
+
+    df = pd.read_csv(ruta_csv, dtype=_DTYPES_DIRECCIONES)
+
+    if PYARROW_AVAILABLE:
+        try:
+            df.to_parquet(ruta_parquet, engine='pyarrow', compression='snappy')
+        except OSError as e:
+            print(f"⚠️ No se pudo escribir el cache Parquet: {e}")
+
+    return df
+
+
+@functools.lru_cache(maxsize=None)
+def _cargar_direcciones_memo(ruta_csv: str, mtime: float) -> pd.DataFrame:
+    # mtime forma parte de la clave: si el CSV se regenera en un proceso
+    # vivo (apps Streamlit), la entrada vieja deja de coincidir
+    return cargar_direcciones(ruta_csv)
+
+
+def cargar_direcciones_memo(ruta_csv: str = "data/direcciones_ejemplo.csv") -> pd.DataFrame:
+    """
+    Memoized variant of :func:`cargar_direcciones`, keyed on path + mtime.
+
+    Useful when several map builders run in the same process: the CSV is
+    parsed once per file version and the same DataFrame is shared; a
+    regenerated CSV invalidates the entry automatically. Callers must
+    treat the returned frame as read-only (use ``df.copy()`` before
+    mutating).
+
+    Args:
+        ruta_csv (str, optional): Path to the source CSV file.
+
+    Returns:
+        pd.DataFrame: The shared address dataset.
+    """
+    return _cargar_direcciones_memo(ruta_csv, os.path.getmtime(ruta_csv))
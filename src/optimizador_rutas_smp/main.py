@@ -10,16 +10,17 @@ import numpy as np
 from typing import Optional, Dict
 import argparse
 
-# Agregar el directorio actual al path para importar módulos locales
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# Agregar src/ al path para poder ejecutarse como script suelto
+# (python src/optimizador_rutas_smp/main.py) sin instalar el paquete
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
-    from data_generator import DataGenerator
-    from route_optimizer import RouteOptimizer
-    from map_visualizer import MapVisualizer
+    from optimizador_rutas_smp.data_generator import DataGenerator
+    from optimizador_rutas_smp.route_optimizer import RouteOptimizer
+    from optimizador_rutas_smp.map_visualizer import MapVisualizer
 except ImportError as e:
     print(f"⚠️ Error importando módulos: {e}")
-    print("   Asegúrese de que todos los archivos estén en el directorio src/")
+    print("   Asegúrese de que todos los archivos estén en src/optimizador_rutas_smp/")
 
 
 class LogisticsOptimizer:
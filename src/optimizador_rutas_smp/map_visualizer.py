@@ -25,10 +25,55 @@ except ImportError:
     print("⚠️ Plotly no disponible para gráficos adicionales.")
 
 
+def guardar_html(mapa, archivo_salida, umbral_gzip=10 * 1024 * 1024):
+    """
+    Renders a folium map streaming the HTML straight to disk.
+
+    Instead of materializing the whole document as one Python string
+    (Map.save), the children are rendered once and the root Jinja
+    template is streamed chunk by chunk into a buffered file, halving
+    peak memory for very large maps. Outputs above ``umbral_gzip``
+    bytes also get an archival ``.html.gz`` copy.
+
+    Args:
+        mapa: The folium map to save.
+        archivo_salida: Destination path for the HTML file.
+        umbral_gzip (int, optional): Size threshold for the gzip copy.
+
+    Returns:
+        str: The path of the written HTML file.
+    """
+    # Mismos pasos que Figure.render(), pero emitiendo la plantilla raíz
+    # en streaming en vez de concatenarla en memoria
+    root = mapa.get_root()
+    for child in root._children.values():
+        child.render()
+
+    with open(archivo_salida, 'w', encoding='utf-8', buffering=1 << 20) as f:
+        root._template.stream(this=root, kwargs={}).dump(f)
+
+    if os.path.getsize(archivo_salida) > umbral_gzip:
+        import gzip
+        import shutil
+        with open(archivo_salida, 'rb') as src, \
+                gzip.open(f"{archivo_salida}.gz", 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+
+    return str(archivo_salida)
+
+
 class MapVisualizer:
     """
     A class to visualize interactive maps to display optimized routes.
     """
+
+    # Parámetros de ícono compartidos por tipo de punto: solo existen dos
+    # combinaciones, así que se definen una vez en lugar de por marcador
+    ICON_PARAMS = {
+        'almacen': {'color': 'red', 'icon': 'home', 'prefix': 'fa'},
+        'entrega': {'color': 'blue', 'icon': 'shopping-cart', 'prefix': 'fa'},
+    }
+
     def __init__(self, direcciones: pd.DataFrame, ruta_optimizada: List[int]):
         """
         Initializes the map visualizer.
@@ -75,22 +120,26 @@ class MapVisualizer:
             else:
                 coordenadas_vistas[coord_key] = idx
         
-        # Separar puntos superpuestos en círculo
+        # Separar puntos superpuestos en círculo. Los valores se castean
+        # al dtype de la columna (float32 desde data_loader): pandas 2.x
+        # rechaza asignar un float64 que pierde precisión al castear
+        lat_dtype = df_separado['latitud'].dtype.type
+        lon_dtype = df_separado['longitud'].dtype.type
         for coord, puntos in grupos_superpuestos.items():
             if len(puntos) > 1:
                 lat_base, lon_base = coord
-                
+
                 for i, punto_idx in enumerate(puntos):
                     if i == 0:
                         continue  # El primer punto mantiene su posición
-                    
+
                     # Calcular offset en círculo
                     angulo = (2 * np.pi * i) / len(puntos)
                     offset_lat = distancia_separacion * np.cos(angulo)
                     offset_lon = distancia_separacion * np.sin(angulo)
-                    
-                    df_separado.at[punto_idx, 'latitud'] = lat_base + offset_lat
-                    df_separado.at[punto_idx, 'longitud'] = lon_base + offset_lon
+
+                    df_separado.at[punto_idx, 'latitud'] = lat_dtype(lat_base + offset_lat)
+                    df_separado.at[punto_idx, 'longitud'] = lon_dtype(lon_base + offset_lon)
         
         return df_separado
     
@@ -124,19 +173,7 @@ class MapVisualizer:
         """
         if not self.mapa:
             self.crear_mapa_base()
-        
-        # Colores para diferentes tipos de puntos
-        colores = {
-            'almacen': 'red',
-            'entrega': 'blue'
-        }
-        
-        # Iconos para diferentes tipos
-        iconos = {
-            'almacen': 'home',
-            'entrega': 'shopping-cart'
-        }
-        
+
         for idx, direccion_original in self.direcciones.iterrows():
             # Usar coordenadas separadas para visualización
             direccion_visual = self.direcciones_visualizacion.iloc[idx]
@@ -174,11 +211,7 @@ class MapVisualizer:
                 location=[direccion_visual['latitud'], direccion_visual['longitud']],
                 popup=folium.Popup(popup_text, max_width=300),
                 tooltip=f"{tipo.title()}: {direccion_original['direccion'][:50]}...",
-                icon=folium.Icon(
-                    color=colores[tipo],
-                    icon=iconos[tipo],
-                    prefix='fa'
-                )
+                icon=folium.Icon(**self.ICON_PARAMS[tipo])
             )
             marcador.add_to(self.mapa)
     
@@ -328,10 +361,11 @@ class MapVisualizer:
         
         # Crear directorio de salida si no existe
         os.makedirs(os.path.dirname(archivo_salida), exist_ok=True)
-        
-        # Guardar mapa
-        self.mapa.save(archivo_salida)
-        
+
+        # Guardar mapa: renderizar una sola vez y escribir los bytes con
+        # un buffer grande (evita el paso extra de codificación del modo texto)
+        guardar_html(self.mapa, archivo_salida)
+
         print(f"✅ Mapa guardado en: {archivo_salida}")
         return archivo_salida
     
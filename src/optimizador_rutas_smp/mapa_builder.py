@@ -0,0 +1,279 @@
+"""
+Constructor compartido para los mapas de las "soluciones" de visualización.
+
+solucion_definitiva.py y solucion_perfecta.py duplicaban ~90% del flujo
+(carga del CSV, matriz de distancias, solver y construcción del mapa).
+Aquí el trabajo común se ejecuta una sola vez por proceso (carga
+memoizada + cache en disco del solver) y cada script aporta únicamente
+su estilo: colores, iconos, popups y panel informativo.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .cache import matriz_distancias_cacheada, resultado_optimizacion_cacheado
+from .data_generator import DataGenerator
+from .data_loader import cargar_direcciones_memo
+
+# folium (y map_visualizer, que lo importa) se cargan dentro de
+# construir_mapa: quien solo necesita detectar/separar puntos
+# superpuestos no paga los ~200 ms de importar folium + branca + jinja2
+
+# Callback JS para FastMarkerCluster: construye cada marcador en el
+# navegador a partir de una fila [lat, lon, color, icono, popup, tooltip],
+# enviando un único blob JSON en vez de N objetos Folium. __MAXW__ se
+# sustituye por el ancho máximo de popup de cada variante
+_CALLBACK_MARCADORES_TMPL = """
+function (row) {
+    var marker = L.marker(new L.LatLng(row[0], row[1]), {
+        icon: L.AwesomeMarkers.icon({
+            icon: row[3], markerColor: row[2], prefix: 'fa'
+        })
+    });
+    marker.bindPopup(row[4], {maxWidth: __MAXW__});
+    marker.bindTooltip(row[5]);
+    return marker;
+}
+"""
+
+
+def detectar_puntos_superpuestos(df, eps=1e-6):
+    """Detecta puntos con coordenadas idénticas o casi idénticas.
+
+    Las coordenadas se cuantizan a una grilla de paso ``eps`` y se
+    agrupan con un groupby (hash table en C): además de duplicados
+    exactos detecta casi-duplicados a menos de ~eps grados, sin
+    depender de scipy.
+    """
+    print("🔍 DETECTANDO PUNTOS SUPERPUESTOS:")
+
+    coords = df[['latitud', 'longitud']].to_numpy(dtype=np.float64)
+    celdas = np.round(coords / eps).astype(np.int64)
+    grupos = pd.DataFrame(celdas, columns=['lat', 'lon'],
+                          index=df.index).groupby(['lat', 'lon']).indices
+
+    grupos_superpuestos = {
+        (round(float(coords[indices[0], 0]), 6),
+         round(float(coords[indices[0], 1]), 6)): [int(i) for i in indices]
+        for indices in grupos.values()
+        if len(indices) > 1
+    }
+
+    direcciones = df['direccion'].to_numpy()
+    for coord, puntos in grupos_superpuestos.items():
+        print(f"   ⚠️ Coordenada {coord}: Puntos {puntos}")
+        for punto in puntos:
+            print(f"      - Punto {punto}: {direcciones[punto]}")
+
+    return grupos_superpuestos
+
+
+def separar_puntos_superpuestos(df, distancia_separacion=0.0005):
+    """Separa visualmente los puntos superpuestos.
+
+    Devuelve arrays (lat, lon) ya ajustados en vez de un DataFrame:
+    solo se duplican las dos columnas de coordenadas que se modifican,
+    no todas las columnas (las direcciones son lo más pesado del frame).
+    """
+    lat_mod = df['latitud'].to_numpy(dtype=np.float64, copy=True)
+    lon_mod = df['longitud'].to_numpy(dtype=np.float64, copy=True)
+    grupos = detectar_puntos_superpuestos(df)
+
+    print(f"\n🛠️ SEPARANDO PUNTOS SUPERPUESTOS (distancia: {distancia_separacion}):")
+
+    for coord, puntos in grupos.items():
+        if len(puntos) > 1:
+            lat_base, lon_base = coord
+
+            # Posiciones en círculo calculadas de una sola vez: un array de
+            # ángulos y un cos/sin vectorizado en vez de llamadas escalares.
+            # El primer punto del grupo mantiene su posición original
+            idxs = np.asarray(puntos[1:])
+            angulos = (2 * np.pi * np.arange(1, len(puntos))) / len(puntos)
+            nuevas_lat = lat_base + distancia_separacion * np.cos(angulos)
+            nuevas_lon = lon_base + distancia_separacion * np.sin(angulos)
+
+            # Una sola escritura a stdout en vez de un print por punto
+            sys.stdout.write(''.join(
+                f"   📍 Punto {punto_idx}: {lat_base:.6f}, {lon_base:.6f} → {nueva_lat:.6f}, {nueva_lon:.6f}\n"
+                for punto_idx, nueva_lat, nueva_lon in zip(idxs, nuevas_lat, nuevas_lon)
+            ))
+
+            # Asignación en bloque sobre los arrays de coordenadas
+            lat_mod[idxs] = nuevas_lat
+            lon_mod[idxs] = nuevas_lon
+
+    return lat_mod, lon_mod
+
+
+def resolver_ruta_cacheada(df):
+    """Resuelve la ruta óptima para el DataFrame (con cache en disco).
+
+    La matriz de distancias y el resultado del solver se cachean por
+    hash de coordenadas, así que generar varias variantes de mapa — en
+    el mismo proceso o en corridas sucesivas — ejecuta el TSP una vez.
+    """
+    coordenadas = df[['latitud', 'longitud']].to_numpy(dtype=np.float64)
+    generator = DataGenerator()
+    matriz_distancias = matriz_distancias_cacheada(generator, coordenadas)
+    return resultado_optimizacion_cacheado(matriz_distancias, df, "ortools")
+
+
+def construir_mapa(estilo):
+    """Construye y guarda una variante de mapa según ``estilo``.
+
+    ``estilo`` es un dict con las claves:
+        archivo: nombre del HTML de salida (bajo output/).
+        zoom: zoom inicial del mapa.
+        separar: callable(df) -> (lat, lon) con coordenadas de visualización.
+        color_icono: callable(idx, tipo) -> (color, icono).
+        popup: callable(idx, tipo, color, orden, direccion,
+                        lat_sep, lon_sep, lat_orig, lon_orig) -> html.
+        tooltip: callable(idx, tipo, orden) -> str.
+        log_marcador: callable(idx, tipo, color, orden, direccion) -> str.
+        puntos_destacados: set de índices con marcador individual.
+        popup_max_width: ancho máximo de popup en píxeles.
+        linea: dict con weight/opacity de la línea de ruta.
+        info_html: callable(distancia, ruta) -> html del panel fijo.
+
+    Returns:
+        dict: archivo generado, ruta y distancia de la optimización.
+    """
+    import folium
+    from folium import plugins
+    from .map_visualizer import guardar_html
+
+    df = cargar_direcciones_memo()
+    lat_sep, lon_sep = estilo['separar'](df)
+    lat_orig = df['latitud'].to_numpy()
+    lon_orig = df['longitud'].to_numpy()
+    tipos = df['tipo'].to_numpy()
+    direcciones = df['direccion'].to_numpy()
+
+    # Optimizar con las coordenadas originales (no las separadas)
+    print("\n🚀 OPTIMIZANDO RUTA:")
+    resultado = resolver_ruta_cacheada(df)
+    ruta = resultado['mejor_ruta']
+    distancia = resultado['mejor_distancia_km']
+    print(f"   ✅ Ruta optimizada: {distancia:.2f} km")
+    print(f"   ✅ Secuencia: {ruta}")
+
+    print(f"\n🗺️ CONSTRUYENDO MAPA ({estilo['archivo']}):")
+    mapa = folium.Map(
+        location=[-11.9775, -77.0904],
+        zoom_start=estilo['zoom'],
+        tiles='OpenStreetMap'
+    )
+
+    # Orden de visita precalculado: ruta.index(idx) es O(len(ruta)) por
+    # marcador; un array de lookup lo hace O(1). Se asigna en orden
+    # inverso para que los puntos repetidos (el almacén abre y cierra la
+    # ruta) conserven su primera aparición, igual que ruta.index
+    orden = np.full(len(df), -1, dtype=np.intp)
+    orden[np.asarray(ruta)[::-1]] = np.arange(len(ruta), 0, -1)
+
+    # Marcadores regulares en lote vía FastMarkerCluster; solo los
+    # puntos destacados se agregan como marcadores Folium individuales
+    datos_cluster = []
+    marcadores_destacados = {}
+    lineas_log = []
+
+    for idx in range(len(df)):
+        tipo = tipos[idx]
+        color, icono_fa = estilo['color_icono'](idx, tipo)
+        orden_en_ruta = int(orden[idx]) if orden[idx] > 0 else 'N/A'
+
+        popup_html = estilo['popup'](
+            idx=idx, tipo=tipo, color=color, orden=orden_en_ruta,
+            direccion=direcciones[idx],
+            lat_sep=lat_sep[idx], lon_sep=lon_sep[idx],
+            lat_orig=lat_orig[idx], lon_orig=lon_orig[idx],
+        )
+        tooltip = estilo['tooltip'](idx, tipo, orden_en_ruta)
+
+        # BeautifyIcon fusiona el número de orden en el propio icono, en
+        # vez de duplicar cada punto con un segundo marcador DivIcon
+        if idx in estilo['puntos_destacados']:
+            if orden_en_ruta != 'N/A':
+                icono = plugins.BeautifyIcon(
+                    icon=icono_fa, number=orden_en_ruta, border_color=color,
+                    text_color='white', background_color=color,
+                    inner_icon_style='font-size:12px;'
+                )
+            else:
+                icono = folium.Icon(color=color, icon=icono_fa, prefix='fa')
+            marcador = folium.Marker(
+                location=[lat_sep[idx], lon_sep[idx]],
+                popup=folium.Popup(popup_html, max_width=estilo['popup_max_width']),
+                tooltip=tooltip,
+                icon=icono
+            )
+            marcadores_destacados[marcador.get_name()] = marcador
+        else:
+            datos_cluster.append([
+                lat_sep[idx], lon_sep[idx], color, icono_fa, popup_html, tooltip
+            ])
+
+        lineas_log.append(
+            estilo['log_marcador'](idx, tipo, color, orden_en_ruta, direcciones[idx]))
+
+    # Una sola escritura a stdout en vez de un print por marcador
+    sys.stdout.write('\n'.join(lineas_log) + '\n')
+
+    # Inserción en lote: un solo dict.update en vez de un add_to (que
+    # recorre el árbol de elementos) por marcador
+    for marcador in marcadores_destacados.values():
+        marcador._parent = mapa
+    mapa._children.update(marcadores_destacados)
+
+    if datos_cluster:
+        callback = _CALLBACK_MARCADORES_TMPL.replace(
+            '__MAXW__', str(estilo['popup_max_width']))
+        plugins.FastMarkerCluster(datos_cluster, callback=callback).add_to(mapa)
+
+    # Línea de ruta con las coordenadas separadas: un fancy-index +
+    # column_stack en C en vez de N appends en Python
+    print("\n🛣️ AGREGANDO LÍNEA DE RUTA:")
+    ruta_np = np.asarray(ruta, dtype=np.intp)
+
+    # GeoJSON con la geometría completa en un solo dump, en vez de la
+    # serialización elemento a elemento de PolyLine (GeoJSON usa [lon, lat])
+    geojson_ruta = {
+        "type": "Feature",
+        "geometry": {
+            "type": "LineString",
+            "coordinates": np.column_stack(
+                [lon_sep[ruta_np], lat_sep[ruta_np]]).tolist(),
+        },
+        "properties": {"distancia_km": round(distancia, 2)},
+    }
+    estilo_linea = dict(estilo['linea'], color='red')
+    folium.GeoJson(
+        geojson_ruta,
+        style_function=lambda f: estilo_linea,
+        tooltip=f'Ruta Optimizada: {distancia:.2f} km'
+    ).add_to(mapa)
+
+    # Panel informativo fijo de la variante
+    mapa.get_root().html.add_child(
+        folium.Element(estilo['info_html'](distancia, ruta)))
+
+    # Controles y plugins
+    folium.LayerControl().add_to(mapa)
+    plugins.Fullscreen().add_to(mapa)
+    plugins.MeasureControl().add_to(mapa)
+
+    # Guardar: render único + escritura binaria bufferizada
+    output_dir = Path("output")
+    output_dir.mkdir(exist_ok=True)
+    archivo = output_dir / estilo['archivo']
+    guardar_html(mapa, str(archivo))
+
+    return {
+        'archivo': str(archivo),
+        'ruta': ruta,
+        'distancia': distancia,
+    }
@@ -17,6 +17,11 @@ except ImportError:
     ORTOOLS_AVAILABLE = False
     print("ADVERTENCIA: OR-Tools no disponible. Se usaran algoritmos alternativos.")
 
+# Límite de puntos para fuerza bruta: 8 puntos son 5040 permutaciones;
+# con 10 ya son 362880 y el tiempo lo domina este método sin aportar nada
+# frente a OR-Tools
+FUERZA_BRUTA_MAX_PUNTOS = 8
+
 
 class RouteOptimizer:
     """
@@ -40,12 +45,12 @@ class RouteOptimizer:
     def algoritmo_fuerza_bruta(self) -> Tuple[List[int], float]:
         """
         Implements a brute-force algorithm for TSP.
-        Only recommended for a small number of points (<10).
+        Only recommended for a small number of points (<= FUERZA_BRUTA_MAX_PUNTOS).
 
         Returns:
             Tuple[List[int], float]: A tuple containing the best route and the total distance.
         """
-        if self.num_puntos > 10:
+        if self.num_puntos > FUERZA_BRUTA_MAX_PUNTOS:
             print("ADVERTENCIA: Demasiados puntos para fuerza bruta. Usando algoritmo heuristico.")
             return self.algoritmo_vecino_mas_cercano()
         
@@ -97,8 +102,10 @@ class RouteOptimizer:
         # Regresar al almacén
         ruta.append(0)
         distancia_total += self.matriz_distancias[actual][0]
-        
-        return ruta, distancia_total
+
+        # float nativo: los escalares np.float32 de la matriz no son
+        # subclase de float y json.dump(default=str) los vuelve strings
+        return ruta, float(distancia_total)
     
     def algoritmo_ortools(self) -> Tuple[List[int], float]:
         """
@@ -122,12 +129,16 @@ class RouteOptimizer:
         )
         
         routing = pywrapcp.RoutingModel(manager)
-        
+
+        # OR-Tools trabaja con costos enteros: cuantizar la matriz una
+        # sola vez (metros como int32) en vez de convertir por llamada
+        matriz_int = np.rint(np.asarray(self.matriz_distancias) * 1000).astype(np.int32)
+
         # Función de distancia
         def distance_callback(from_index, to_index):
             from_node = manager.IndexToNode(from_index)
             to_node = manager.IndexToNode(to_index)
-            return int(self.matriz_distancias[from_node][to_node] * 1000)  # Convertir a enteros
+            return int(matriz_int[from_node][to_node])
         
         transit_callback_index = routing.RegisterTransitCallback(distance_callback)
         routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
@@ -174,7 +185,8 @@ class RouteOptimizer:
         distancia_total = 0
         for i in range(len(ruta) - 1):
             distancia_total += self.matriz_distancias[ruta[i]][ruta[i + 1]]
-        return distancia_total
+        # float nativo por la misma razón que en vecino_mas_cercano
+        return float(distancia_total)
     
     def optimizar_ruta(self, metodo="ortools"):
         """
@@ -199,7 +211,7 @@ class RouteOptimizer:
             
             resultados['ortools'] = {
                 'ruta': ruta,
-                'distancia_km': round(distancia, 2),
+                'distancia_km': round(float(distancia), 2),
                 'tiempo_segundos': round(tiempo, 2),
                 'num_paradas': len(ruta) - 1
             }
@@ -211,19 +223,19 @@ class RouteOptimizer:
             
             resultados['vecino_cercano'] = {
                 'ruta': ruta,
-                'distancia_km': round(distancia, 2),
+                'distancia_km': round(float(distancia), 2),
                 'tiempo_segundos': round(tiempo, 2),
                 'num_paradas': len(ruta) - 1
             }
         
-        if metodo == "fuerza_bruta" or (metodo == "todos" and self.num_puntos <= 10):
+        if metodo == "fuerza_bruta" or (metodo == "todos" and self.num_puntos <= FUERZA_BRUTA_MAX_PUNTOS):
             inicio = time.time()
             ruta, distancia = self.algoritmo_fuerza_bruta()
             tiempo = time.time() - inicio
             
             resultados['fuerza_bruta'] = {
                 'ruta': ruta,
-                'distancia_km': round(distancia, 2),
+                'distancia_km': round(float(distancia), 2),
                 'tiempo_segundos': round(tiempo, 2),
                 'num_paradas': len(ruta) - 1
             }
@@ -267,10 +279,10 @@ class RouteOptimizer:
         if self.mejor_distancia and distancia_naive > 0:
             porcentaje_ahorro = ((distancia_naive - self.mejor_distancia) / distancia_naive) * 100
             return {
-                'distancia_naive_km': round(distancia_naive, 2),
+                'distancia_naive_km': round(float(distancia_naive), 2),
                 'distancia_optimizada_km': self.mejor_distancia,
-                'ahorro_km': round(distancia_naive - self.mejor_distancia, 2),
-                'porcentaje_ahorro': round(porcentaje_ahorro, 2)
+                'ahorro_km': round(float(distancia_naive - self.mejor_distancia), 2),
+                'porcentaje_ahorro': round(float(porcentaje_ahorro), 2)
             }
         
         return {}
@@ -8,8 +8,8 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 import pandas as pd
 import numpy as np
-from data_generator import DataGenerator
-from route_optimizer import RouteOptimizer
+from optimizador_rutas_smp.data_generator import DataGenerator
+from optimizador_rutas_smp.route_optimizer import RouteOptimizer
 
 def main():
     """
@@ -11,7 +11,7 @@ from pathlib import Path
 # Agregar src al path
 sys.path.append(str(Path(__file__).parent.parent / "src"))
 
-from data_generator import DataGenerator
+from optimizador_rutas_smp.data_generator import DataGenerator
 
 
 class TestDataGenerator(unittest.TestCase):
@@ -13,8 +13,8 @@ from pathlib import Path
 # Agregar src al path
 sys.path.append(str(Path(__file__).parent.parent / "src"))
 
-from data_generator import DataGenerator
-from route_optimizer import RouteOptimizer
+from optimizador_rutas_smp.data_generator import DataGenerator
+from optimizador_rutas_smp.route_optimizer import RouteOptimizer
 
 
 class TestIntegracion(unittest.TestCase):
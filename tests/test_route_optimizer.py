@@ -11,7 +11,7 @@ from pathlib import Path
 # Agregar src al path
 sys.path.append(str(Path(__file__).parent.parent / "src"))
 
-from route_optimizer import RouteOptimizer
+from optimizador_rutas_smp.route_optimizer import RouteOptimizer
 
 
 class TestRouteOptimizer(unittest.TestCase):
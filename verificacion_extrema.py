@@ -17,8 +17,8 @@ current_dir = Path(__file__).parent
 src_dir = current_dir / "src"
 sys.path.append(str(src_dir))
 
-from data_generator import DataGenerator
-from route_optimizer import RouteOptimizer
+from optimizador_rutas_smp.data_generator import DataGenerator
+from optimizador_rutas_smp.route_optimizer import RouteOptimizer
 
 def crear_mapa_verificacion_completa():
     """Crea un mapa con tabla de verificación completa"""
@@ -144,7 +144,7 @@ def test_data_generation():
     """Prueba rápida de generación de datos"""
     try:
         sys.path.append('src')
-        from data_generator import DataGenerator
+        from optimizador_rutas_smp.data_generator import DataGenerator
         
         print("Probando generación de datos...")
         generator = DataGenerator()
@@ -182,7 +182,7 @@ def test_optimization():
     """Prueba rápida de optimización"""
     try:
         sys.path.append('src')
-        from route_optimizer import RouteOptimizer
+        from optimizador_rutas_smp.route_optimizer import RouteOptimizer
         import pandas as pd
         
         print("Probando optimización de rutas...")